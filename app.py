@@ -1,10 +1,14 @@
+from datetime import datetime, timedelta
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from database import db, init_db
 from routes import api_bp
+from throttling import init_throttle
+import click
 import os
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     
     CORS(app)
@@ -12,17 +16,105 @@ def create_app():
     basedir = os.path.abspath(os.path.dirname(__file__))
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "jobs.db")}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Share rate limits and request coalescing across workers; per-process when unset
+    app.config['THROTTLE_REDIS_URL'] = os.environ.get('REDIS_URL')
+    # Where POST /api/scrape?profile=1 writes its trace, pstats and speedscope files
+    app.config['SCRAPE_PROFILE_DIR'] = os.path.join(basedir, 'profiles')
+    # Number of reverse proxies in front of the app whose X-Forwarded-* headers are trusted
+    app.config['PROXY_COUNT'] = int(os.environ.get('PROXY_COUNT', 0))
+    # Open /api/jobs/changes/stream connections allowed per process; each holds a thread
+    app.config['CHANGE_STREAM_LIMIT'] = int(os.environ.get('CHANGE_STREAM_LIMIT', 4))
+    app.config.update(config or {})
+    
+    # Take the client address from X-Forwarded-For so per-client rate limits
+    # do not collapse into one bucket for the proxy
+    proxy_count = app.config['PROXY_COUNT']
+    if proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count, x_host=proxy_count)
     
     db.init_app(app)
+    init_throttle(app)
     
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    register_commands(app)
+    
     return app
 
+def register_commands(app):
+    """Register CLI commands; schema setup runs here instead of at worker boot"""
+    
+    @app.cli.command('init-db')
+    @click.option('--seed/--no-seed', default=True, help='Add sample jobs if the table is empty.')
+    def init_db_command(seed):
+        """Create missing tables and optionally seed sample data"""
+        init_db(seed=seed)
+        click.echo('Database initialized.')
+    
+    @app.cli.command('migrate-descriptions')
+    @click.option('--batch-size', default=500, show_default=True)
+    @click.option('--retrain', is_flag=True, help='Train a new compression dictionary first.')
+    @click.option('--vacuum', is_flag=True, help='Rebuild jobs.db afterwards to return freed pages.')
+    def migrate_descriptions_command(batch_size, retrain, vacuum):
+        """Move inline descriptions into the compressed, deduplicated store"""
+        from description_store import migrate_descriptions, prune_descriptions
+        
+        migrated = migrate_descriptions(batch_size=batch_size, retrain=retrain)
+        pruned = prune_descriptions()
+        click.echo(f'Migrated {migrated} descriptions, pruned {pruned} unused entries.')
+        
+        if vacuum:
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql('VACUUM')
+        
+        print_description_report()
+    
+    @app.cli.command('prune-descriptions')
+    def prune_descriptions_command():
+        """Delete stored descriptions no job refers to any more"""
+        from description_store import has_description_store, prune_descriptions
+        
+        if not has_description_store():
+            raise click.ClickException('No description store yet; run migrate-descriptions first.')
+        click.echo(f'Pruned {prune_descriptions()} unused descriptions.')
+    
+    @app.cli.command('prune-changes')
+    @click.option('--days', default=7, show_default=True, help='Age in days of the oldest entries to keep.')
+    def prune_changes_command(days):
+        """Delete old change-log entries; clients further behind get a full resync"""
+        from change_feed import prune_changes
+        
+        removed = prune_changes(datetime.utcnow() - timedelta(days=days))
+        click.echo(f'Pruned {removed} change-log entries older than {days} days.')
+    
+    @app.cli.command('description-report')
+    def description_report_command():
+        """Show how much space the description store saves"""
+        from description_store import has_description_store
+        
+        if not has_description_store():
+            raise click.ClickException('No description store yet; run migrate-descriptions first.')
+        print_description_report()
+
+def print_description_report():
+    """Print the description store space report"""
+    from description_store import space_report
+    
+    report = space_report()
+    click.echo(f"Jobs using the store:     {report['jobs_in_store']}")
+    click.echo(f"Unique descriptions:      {report['unique_descriptions']}")
+    click.echo(f"Uncompressed text:        {report['logical_bytes']} bytes")
+    click.echo(f"After deduplication:      {report['unique_bytes']} bytes")
+    click.echo(f"Stored (compressed):      {report['stored_bytes']} bytes")
+    click.echo(f"Dictionaries:             {report['dictionary_bytes']} bytes")
+    click.echo(f"Still inline (legacy):    {report['legacy_inline_bytes']} bytes")
+    click.echo(f"Unused (prunable):        {report['unused_descriptions']} entries")
+    click.echo(f"Saved:                    {report['saved_bytes']} bytes ({report['saved_ratio']:.1%})")
+
 if __name__ == '__main__':
     app = create_app()
     
     with app.app_context():
         init_db()
     
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    app.run(debug=True, port=5000)
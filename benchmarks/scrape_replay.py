@@ -0,0 +1,131 @@
+"""Benchmark the scrape -> clean -> ingest pipeline offline from recorded pages.
+
+Usage:
+    python benchmarks/scrape_replay.py record FIXTURE_DIR [--search "python developer"] [--location ""] [--pages 2]
+    python benchmarks/scrape_replay.py run FIXTURE_DIR [--runs 20] [--profile]
+
+`record` needs Chrome and network access and is run once; `run` replays the
+saved pages through a fake WebDriver with every delay disabled and ingests
+into an in-memory SQLite database, so results are repeatable on machines
+without network.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from app import create_app
+from database import db, init_db
+from models import Job, JobChange, JobDescription
+from routes import ingest_scraped_jobs
+from scrape_profiler import ScrapeProfiler
+from scrape_replay import ReplayDriver, record_fixtures, replay_scraper
+
+def reset_tables():
+    """Empty the tables ingest writes to so every run inserts the same rows"""
+    for model in (Job, JobChange, JobDescription):
+        model.query.delete()
+    db.session.commit()
+
+def run_once(driver, profiler=None):
+    """Replay one full pipeline run; returns (scrape seconds, ingest seconds, jobs, added)"""
+    manifest = driver.manifest
+    scraper = replay_scraper(driver, profiler=profiler)
+    
+    start = time.perf_counter()
+    jobs = scraper.scrape_jobs(manifest['search_term'], manifest['location'], max_pages=manifest['max_pages'])
+    scraped = time.perf_counter()
+    added = ingest_scraped_jobs(jobs)
+    done = time.perf_counter()
+    
+    # JobScraper logs page errors and falls back to sample data, which would
+    # make a broken fixture look like a fast run
+    if driver.missing:
+        sys.exit(f'Fixture is missing pages for: {", ".join(sorted(set(driver.missing)))}')
+    check_jobs(manifest, jobs)
+    
+    return scraped - start, done - scraped, len(jobs), len(added)
+
+def normalize(jobs):
+    # Selenium keeps line breaks in element text; the replay driver collapses whitespace
+    return [{key: ' '.join(value.split()) for key, value in job.items()} for job in jobs]
+
+def check_jobs(manifest, jobs):
+    """Exit unless replay extracted the same jobs as the live recording run"""
+    expected = manifest.get('jobs')
+    if expected is None:
+        sys.exit('Fixture has no recorded jobs; record it again to benchmark it')
+    if normalize(jobs) != normalize(expected):
+        mismatch = next((i for i, (got, want) in enumerate(zip(normalize(jobs), normalize(expected))) if got != want),
+                        min(len(jobs), len(expected)))
+        sys.exit(f'Replay extracted {len(jobs)} jobs, the live run {len(expected)}; '
+                 f'first difference at job {mismatch}')
+
+def summarize(label, samples):
+    print(f'  {label:<8} min {min(samples) * 1000:8.2f} ms  median {statistics.median(samples) * 1000:8.2f} ms  '
+          f'max {max(samples) * 1000:8.2f} ms')
+
+def run(args):
+    # One driver for every run: pages are parsed on the first run and cached,
+    # so later runs time extraction and ingest rather than HTML parsing
+    driver = ReplayDriver(args.fixture_dir, strict=True)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    
+    with app.app_context():
+        init_db(seed=False)
+        
+        scrape_times, ingest_times = [], []
+        for _ in range(args.runs):
+            reset_tables()
+            scrape_time, ingest_time, job_count, added = run_once(driver)
+            scrape_times.append(scrape_time)
+            ingest_times.append(ingest_time)
+        
+        print(f'Replayed {len(driver.manifest["pages"])} pages, {job_count} jobs, {added} ingested, {args.runs} runs:')
+        summarize('scrape', scrape_times)
+        summarize('ingest', ingest_times)
+        summarize('total', [s + i for s, i in zip(scrape_times, ingest_times)])
+        
+        if args.profile:
+            reset_tables()
+            with ScrapeProfiler(output_dir=args.profile_dir) as profiler:
+                run_once(driver, profiler=profiler)
+            for kind, path in profiler.write().items():
+                print(f'  {kind}: {path}')
+
+def record(args):
+    jobs = record_fixtures(args.fixture_dir, args.search, args.location, args.pages, headless=not args.show)
+    print(f'Recorded pages to {args.fixture_dir}; live run extracted {len(jobs)} jobs')
+    if not jobs:
+        print('No jobs were extracted, so replaying this fixture will fail its check; record again')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    record_parser = commands.add_parser('record', help='Save live Indeed result pages')
+    record_parser.add_argument('fixture_dir')
+    record_parser.add_argument('--search', default='software engineer')
+    record_parser.add_argument('--location', default='')
+    record_parser.add_argument('--pages', type=int, default=2)
+    record_parser.add_argument('--show', action='store_true', help='Run Chrome with a visible window.')
+    record_parser.set_defaults(func=record)
+    
+    run_parser = commands.add_parser('run', help='Replay recorded pages through the pipeline')
+    run_parser.add_argument('fixture_dir')
+    run_parser.add_argument('--runs', type=int, default=20)
+    run_parser.add_argument('--profile', action='store_true', help='Profile one extra run and write its files.')
+    run_parser.add_argument('--profile-dir', default=os.path.join(ROOT, 'profiles'))
+    run_parser.set_defaults(func=run)
+    
+    args = parser.parse_args()
+    if args.command == 'run' and args.runs < 1:
+        parser.error('--runs must be at least 1')
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
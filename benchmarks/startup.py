@@ -0,0 +1,105 @@
+"""Measure cold import time and per-worker memory of the API under gunicorn.
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [--workers 4] [--no-preload]
+
+Cold import time is taken from fresh interpreters so nothing is cached in
+sys.modules. Worker memory is read from /proc (Linux only): RSS counts every
+resident page, while PSS and Private_Dirty show how much of it is actually
+shared with the master after fork.
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_SNIPPET = (
+    'import time; t = time.perf_counter(); '
+    'from app import create_app; create_app(); '
+    'print(time.perf_counter() - t)'
+)
+
+def measure_import(runs):
+    """Time `create_app()` from a cold interpreter, once per run"""
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip()))
+    return samples
+
+def read_memory(pid):
+    """Return RSS, PSS and private dirty memory of a process in KiB"""
+    usage = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Dirty'):
+                usage[key] = int(rest.split()[0])
+    return usage
+
+def worker_pids(master_pid):
+    """List the pids of a gunicorn master's worker processes"""
+    children = f'/proc/{master_pid}/task/{master_pid}/children'
+    with open(children) as f:
+        return [int(pid) for pid in f.read().split()]
+
+def measure_workers(workers, preload, port):
+    """Start gunicorn, wait for its workers and sample their memory"""
+    cmd = [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+        '--workers', str(workers), '--bind', f'127.0.0.1:{port}'
+    ]
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0')
+    
+    master = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        pids = []
+        while time.monotonic() < deadline:
+            pids = worker_pids(master.pid)
+            if len(pids) == workers:
+                break
+            time.sleep(0.2)
+        # Let the workers finish booting before sampling
+        time.sleep(2)
+        return read_memory(master.pid), [read_memory(pid) for pid in worker_pids(master.pid)]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--no-preload', action='store_true')
+    args = parser.parse_args()
+    
+    samples = measure_import(args.runs)
+    print(f'Cold import + create_app over {args.runs} runs:')
+    print(f'  min {min(samples) * 1000:.1f} ms  median {statistics.median(samples) * 1000:.1f} ms  '
+          f'max {max(samples) * 1000:.1f} ms')
+    
+    if not sys.platform.startswith('linux'):
+        print('Worker memory needs /proc; skipping.')
+        return
+    
+    master, workers = measure_workers(args.workers, not args.no_preload, args.port)
+    mode = 'no preload' if args.no_preload else 'preload'
+    print(f'\nGunicorn with {args.workers} workers ({mode}), KiB:')
+    print(f'  master     RSS {master["Rss"]:>8}  PSS {master["Pss"]:>8}  private dirty {master["Private_Dirty"]:>8}')
+    for i, usage in enumerate(workers, 1):
+        print(f'  worker {i:<3} RSS {usage["Rss"]:>8}  PSS {usage["Pss"]:>8}  private dirty {usage["Private_Dirty"]:>8}')
+    if workers:
+        print(f'  mean worker private dirty: {statistics.mean(u["Private_Dirty"] for u in workers):.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import json
+import logging
+import queue
+import threading
+from database import db
+from models import JobChange
+
+logger = logging.getLogger(__name__)
+
+def record_change(job, action):
+    """Add a change-log entry for a job to the current session.
+    
+    Call before committing so the entry lands in the same transaction as the
+    mutation itself. The job must already have an id (flush first on insert).
+    """
+    # Full snapshot including the description, so clients see edits to it too
+    payload = None if action == 'deleted' else json.dumps(job.to_dict(include_description=True))
+    db.session.add(JobChange(job_id=job.id, action=action, payload=payload))
+
+def get_changes_since(since, limit=500):
+    """Return change entries with seq greater than `since`, oldest first"""
+    return JobChange.query.filter(JobChange.seq > since)\
+                          .order_by(JobChange.seq.asc())\
+                          .limit(limit).all()
+
+def get_latest_seq():
+    """Return the highest seq in the change log, or 0 when it is empty"""
+    return db.session.query(db.func.max(JobChange.seq)).scalar() or 0
+
+def get_oldest_seq():
+    """Return the lowest seq still in the change log, or None when it is empty"""
+    return db.session.query(db.func.min(JobChange.seq)).scalar()
+
+def changes_pruned_since(since):
+    """Whether entries after `since` were pruned, so replaying the log cannot catch up.
+    
+    Seqs come from AUTOINCREMENT and a rolled-back insert does not consume
+    one, so any gap below the oldest retained entry was left by pruning.
+    """
+    oldest = get_oldest_seq()
+    return oldest is not None and since < oldest - 1
+
+def prune_changes(before):
+    """Delete change entries made before a datetime; returns the number removed.
+    
+    The newest entry is always kept so the log still records how far it
+    reached (see changes_pruned_since).
+    """
+    removed = JobChange.query.filter(JobChange.changed_at < before, JobChange.seq < get_latest_seq())\
+                             .delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+def format_sse(change):
+    """Render a change entry as a Server-Sent Events frame"""
+    return f"id: {change['seq']}\nevent: {change['action']}\ndata: {json.dumps(change)}\n\n"
+
+def format_reset(last_seq):
+    """Render the SSE frame telling a client to reload all jobs and resume at last_seq"""
+    return f"id: {last_seq}\nevent: reset\ndata: {json.dumps({'reset': True, 'last_seq': last_seq})}\n\n"
+
+def backfill(since, until, batch_size=500):
+    """Yield (seq, frame) for entries in (since, until], reading in batches"""
+    while since < until:
+        changes = [c for c in get_changes_since(since, batch_size) if c.seq <= until]
+        if not changes:
+            return
+        for change in changes:
+            yield change.seq, format_sse(change.to_dict())
+        since = changes[-1].seq
+
+class ChangeFeed:
+    """Tail the change log once per process and fan entries out to subscribers.
+    
+    Every worker may write to the log, so a single background thread polls the
+    table for new rows, renders each one as an SSE frame once, and pushes
+    (seq, frame) pairs to every subscriber's queue. The shared cursor only
+    moves forward; a stream that starts behind it backfills from its own
+    query (see backfill) and then reads the live tail.
+    """
+    
+    def __init__(self, poll_interval=1.0, batch_size=500, max_queue=1000):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.last_seq = 0
+    
+    def start(self, app):
+        """Start the tail thread for this process if it is not running yet"""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, args=(app,), name='change-feed', daemon=True)
+            self.thread.start()
+    
+    def notify(self):
+        """Wake the tail thread early after a local commit"""
+        self.wakeup.set()
+    
+    def subscribe(self, latest_seq, limit=None):
+        """Register a subscriber on the live tail.
+        
+        Returns the queue and the seq it is attached at: every entry after
+        that seq will be pushed to the queue, earlier ones must be backfilled
+        by the caller. `latest_seq` lets an idle tail skip ahead instead of
+        replaying history nobody is waiting for. Raises queue.Full when
+        `limit` subscribers are already attached.
+        """
+        q = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            if limit is not None and len(self.subscribers) >= limit:
+                raise queue.Full
+            if not self.subscribers:
+                self.last_seq = max(self.last_seq, latest_seq)
+            self.subscribers.add(q)
+            attached_seq = self.last_seq
+        self.wakeup.set()
+        return q, attached_seq
+    
+    def unsubscribe(self, q):
+        """Remove a subscriber queue"""
+        with self.lock:
+            self.subscribers.discard(q)
+    
+    def _run(self, app):
+        while True:
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+            
+            with self.lock:
+                if not self.subscribers:
+                    continue
+                since = self.last_seq
+            
+            try:
+                with app.app_context():
+                    changes = get_changes_since(since, self.batch_size)
+                    events = [(c.seq, format_sse(c.to_dict())) for c in changes]
+                    db.session.remove()
+            except Exception as e:
+                logger.warning(f"Change feed poll failed: {e}")
+                continue
+            
+            if not events:
+                continue
+            
+            with self.lock:
+                # A first subscriber may have moved the cursor ahead meanwhile
+                if self.last_seq == since:
+                    self.last_seq = events[-1][0]
+            self._publish(events)
+            
+            # More rows than one batch are pending; poll again right away
+            if len(events) == self.batch_size:
+                self.wakeup.set()
+    
+    def _publish(self, events):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        
+        for q in subscribers:
+            for event in events:
+                try:
+                    q.put_nowait(event)
+                except queue.Full:
+                    # A stalled client must not block the others; it gets
+                    # dropped and resumes from Last-Event-ID on reconnect
+                    self.unsubscribe(q)
+                    while not q.empty():
+                        try:
+                            q.get_nowait()
+                        except queue.Empty:
+                            break
+                    q.put_nowait(None)
+                    break
+
+feed = ChangeFeed()
@@ -3,15 +3,16 @@ from flask_sqlalchemy import SQLAlchemy
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
 
-def init_db():
+def init_db(seed=True):
     """Initialize database and create tables with sample data"""
     from models import Job
+    from description_store import ensure_schema
     
-    # Create all tables
-    db.create_all()
+    # Create all tables and add columns missing from older databases
+    ensure_schema()
     
     # Add sample data if database is empty
-    if Job.query.count() == 0:
+    if seed and Job.query.count() == 0:
         add_sample_data()
 
 def add_sample_data():
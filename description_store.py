@@ -0,0 +1,277 @@
+import hashlib
+import logging
+import re
+import threading
+import zlib
+from collections import Counter
+from sqlalchemy.dialects.sqlite import insert
+from database import db
+from models import Job, JobDescription, DescriptionDictionary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CODEC = 'zstd' if zstandard else 'zlib'
+# Deflate can only reference the last 32 KiB, so a larger zlib dictionary is wasted
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 64 * 1024
+# Descriptions are compressed while the add/scrape request waits; the
+# dictionary, not a slow level, is where most of the saving comes from
+ZSTD_LEVEL = 3
+MIN_TRAINING_SAMPLES = 20
+MAX_TRAINING_SAMPLES = 5000
+
+# Dictionaries never change once written, so each process keeps them forever
+_dictionaries = {}
+# Prepared forms of those dictionaries: digested zstd dictionaries and zlib
+# objects primed with the preset dictionary, which are copied for each use
+_prepared = {}
+# zstd (de)compressors must not be used by two threads at once, so every
+# thread keeps its own per dictionary
+_local = threading.local()
+
+def content_hash(text):
+    """Return the hex SHA-256 of a description"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def load_dictionary(dictionary_id):
+    """Return the raw bytes of a stored dictionary, cached per process"""
+    if dictionary_id is None:
+        return None
+    data = _dictionaries.get(dictionary_id)
+    if data is None:
+        data = _dictionaries[dictionary_id] = db.session.get(DescriptionDictionary, dictionary_id).data
+    return data
+
+def get_active_dictionary(codec):
+    """Return the newest dictionary trained for a codec, if any"""
+    return DescriptionDictionary.query.filter_by(codec=codec)\
+                                      .order_by(DescriptionDictionary.id.desc())\
+                                      .first()
+
+def reset_caches():
+    """Forget cached dictionaries and codecs, e.g. after switching databases"""
+    _dictionaries.clear()
+    _prepared.clear()
+    _local.__dict__.clear()
+
+def prepared(kind, dictionary_id):
+    """Return a dictionary digested for one kind of codec object, built once per process"""
+    key = (kind, dictionary_id)
+    value = _prepared.get(key)
+    if value is None:
+        zdict = load_dictionary(dictionary_id)
+        options = {'zdict': zdict} if zdict else {}
+        if kind == 'zstd':
+            value = zstandard.ZstdCompressionDict(zdict)
+            value.precompute_compress(level=ZSTD_LEVEL)
+        elif kind == 'zlib-compress':
+            value = zlib.compressobj(9, zlib.DEFLATED, -15, **options)
+        else:
+            value = zlib.decompressobj(-15, **options)
+        _prepared[key] = value
+    return value
+
+def zstd_codec(kind, dictionary_id):
+    """Return this thread's ZstdCompressor or ZstdDecompressor for a dictionary"""
+    codecs = _local.__dict__.setdefault('zstd', {})
+    key = (kind, dictionary_id)
+    codec = codecs.get(key)
+    if codec is None:
+        dict_data = prepared('zstd', dictionary_id) if dictionary_id is not None else None
+        if kind == 'compress':
+            codec = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+        else:
+            codec = zstandard.ZstdDecompressor(dict_data=dict_data)
+        codecs[key] = codec
+    return codec
+
+def compress(codec, raw, dictionary_id=None):
+    """Compress bytes with the given codec and optional stored dictionary"""
+    if codec == 'zstd':
+        return zstd_codec('compress', dictionary_id).compress(raw)
+    if codec == 'zlib':
+        # Raw deflate stream: the 6-byte zlib header is noticeable on short texts
+        compressor = prepared('zlib-compress', dictionary_id).copy()
+        return compressor.compress(raw) + compressor.flush()
+    if codec == 'raw':
+        return raw
+    raise ValueError(f'Unknown description codec: {codec}')
+
+def decompress(codec, data, dictionary_id=None):
+    """Decompress a stored description back to text"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read zstd-compressed descriptions')
+        raw = zstd_codec('decompress', dictionary_id).decompress(data)
+    elif codec == 'zlib':
+        decompressor = prepared('zlib-decompress', dictionary_id).copy()
+        raw = decompressor.decompress(data) + decompressor.flush()
+    elif codec == 'raw':
+        raw = data
+    else:
+        raise ValueError(f'Unknown description codec: {codec}')
+    return raw.decode('utf-8')
+
+def find_description(digest):
+    """Return the stored description with this content hash, if any"""
+    return JobDescription.query.filter_by(content_hash=digest).first()
+
+def store_description(text):
+    """Return the JobDescription for a text, inserting it in the current transaction if new"""
+    if not text:
+        return None
+    
+    digest = content_hash(text)
+    entry = find_description(digest)
+    if entry is not None:
+        return entry
+    
+    raw = text.encode('utf-8')
+    dictionary = get_active_dictionary(DEFAULT_CODEC)
+    codec, dictionary_id = DEFAULT_CODEC, dictionary.id if dictionary else None
+    data = compress(codec, raw, dictionary_id)
+    
+    # Very short texts can grow under compression; keep those as-is
+    if len(data) >= len(raw):
+        codec, dictionary_id, data = 'raw', None, raw
+    
+    # Another worker or thread may insert the same text between the lookup
+    # above and this statement; the conflict is then ignored and their row is
+    # used. The insert stays in the caller's transaction, so it is rolled back
+    # with the job if that fails (a SAVEPOINT would commit it on its own under
+    # pysqlite when it opens the transaction)
+    db.session.execute(
+        insert(JobDescription).values(content_hash=digest, codec=codec, dictionary_id=dictionary_id,
+                                      raw_size=len(raw), data=data)
+                              .on_conflict_do_nothing(index_elements=['content_hash'])
+    )
+    entry = find_description(digest)
+    entry._text = text
+    return entry
+
+def build_zlib_dictionary(samples):
+    """Build a deflate preset dictionary from sentences repeated across samples"""
+    counts = Counter()
+    for text in samples:
+        sentences = {s.strip() for s in re.split(r'(?<=[.!?])\s+|\n+', text)}
+        counts.update(s for s in sentences if len(s) >= 20)
+    
+    common = [s for s, n in counts.items() if n >= 2]
+    # Deflate reaches the end of the dictionary with the shortest distances,
+    # so the most frequent boilerplate goes last
+    common.sort(key=lambda s: counts[s])
+    return '\n'.join(common).encode('utf-8')[-ZLIB_DICT_SIZE:]
+
+def train_dictionary(samples, codec=DEFAULT_CODEC):
+    """Train and store a compression dictionary, or return None if it would not help"""
+    samples = [s for s in samples if s][:MAX_TRAINING_SAMPLES]
+    if len(samples) < MIN_TRAINING_SAMPLES:
+        return None
+    
+    if codec == 'zstd':
+        try:
+            data = zstandard.train_dictionary(ZSTD_DICT_SIZE, [s.encode('utf-8') for s in samples]).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.warning(f"Could not train zstd dictionary: {e}")
+            return None
+    else:
+        data = build_zlib_dictionary(samples)
+    
+    if not data:
+        return None
+    
+    dictionary = DescriptionDictionary(codec=codec, data=data)
+    db.session.add(dictionary)
+    db.session.flush()
+    return dictionary
+
+def has_description_store():
+    """Whether the database has the job.description_id column yet"""
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table('job'):
+        return False
+    return 'description_id' in {c['name'] for c in inspector.get_columns('job')}
+
+def ensure_schema():
+    """Create the description tables and add Job.description_id to older databases"""
+    db.create_all()
+    
+    if not has_description_store():
+        with db.engine.begin() as conn:
+            conn.execute(db.text('ALTER TABLE job ADD COLUMN description_id INTEGER REFERENCES job_description(id)'))
+            conn.execute(db.text('CREATE INDEX IF NOT EXISTS ix_job_description_id ON job (description_id)'))
+
+def unused_descriptions():
+    """Query for stored descriptions no job refers to any more.
+    
+    Deleting or editing a job leaves its old description behind; removing it
+    in the request could race with another worker reusing the same hash, so
+    these are cleared in bulk by prune_descriptions instead.
+    """
+    referenced = db.select(Job.description_id).where(Job.description_id.isnot(None))
+    return JobDescription.query.filter(JobDescription.id.notin_(referenced))
+
+def prune_descriptions():
+    """Delete stored descriptions no job refers to; returns the number removed"""
+    removed = unused_descriptions().delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+def migrate_descriptions(batch_size=500, retrain=False):
+    """Move inline Job.description text into the compressed store"""
+    ensure_schema()
+    
+    legacy = Job.query.filter(Job._description.isnot(None), Job._description != '')
+    
+    if retrain or get_active_dictionary(DEFAULT_CODEC) is None:
+        samples = [row[0] for row in legacy.with_entities(Job._description).distinct().limit(MAX_TRAINING_SAMPLES)]
+        samples += [entry.text for entry in JobDescription.query.limit(MAX_TRAINING_SAMPLES - len(samples))]
+        if train_dictionary(samples):
+            db.session.commit()
+    
+    migrated = 0
+    while True:
+        jobs = legacy.order_by(Job.id).limit(batch_size).all()
+        if not jobs:
+            break
+        for job in jobs:
+            job.description = job._description
+        db.session.commit()
+        migrated += len(jobs)
+    
+    return migrated
+
+def _sum_length(column):
+    return db.func.coalesce(db.func.sum(db.func.length(column)), 0)
+
+def space_report():
+    """Summarize how much space the description store saves"""
+    jobs_stored = Job.query.filter(Job.description_id.isnot(None)).count()
+    logical_bytes = db.session.query(db.func.coalesce(db.func.sum(JobDescription.raw_size), 0))\
+                              .join(Job, Job.description_id == JobDescription.id).scalar()
+    unique_count, unique_bytes, stored_bytes = db.session.query(
+        db.func.count(JobDescription.id),
+        db.func.coalesce(db.func.sum(JobDescription.raw_size), 0),
+        _sum_length(JobDescription.data)
+    ).one()
+    dictionary_bytes = db.session.query(_sum_length(DescriptionDictionary.data)).scalar()
+    legacy_bytes = db.session.query(_sum_length(Job._description)).scalar()
+    
+    total_stored = stored_bytes + dictionary_bytes
+    return {
+        'jobs_in_store': jobs_stored,
+        'unique_descriptions': unique_count,
+        'logical_bytes': logical_bytes,
+        'unique_bytes': unique_bytes,
+        'stored_bytes': stored_bytes,
+        'dictionary_bytes': dictionary_bytes,
+        'legacy_inline_bytes': legacy_bytes,
+        'unused_descriptions': unused_descriptions().count(),
+        'saved_bytes': logical_bytes - total_stored,
+        'saved_ratio': 1 - total_stored / logical_bytes if logical_bytes else 0.0
+    }
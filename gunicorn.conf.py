@@ -0,0 +1,34 @@
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Each open /api/jobs/changes/stream holds one of these threads for as long
+# as the client stays connected. Streams are capped per worker at half the
+# threads (CHANGE_STREAM_LIMIT, see create_app) so the rest keep serving the
+# API; raise GUNICORN_THREADS to allow more subscribers per worker
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+os.environ.setdefault('CHANGE_STREAM_LIMIT', str(max(threads // 2, 1)))
+
+# Import the app (routes, models, SQLAlchemy mappers) once in the master so
+# workers inherit those pages instead of rebuilding them after fork
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+wsgi_app = 'wsgi:app'
+
+def when_ready(server):
+    """Move preloaded objects out of the GC's reach before forking workers"""
+    # A collection in a worker touches every tracked object's header, which
+    # would un-share the pages inherited from the master
+    gc.collect()
+    gc.freeze()
+
+def post_fork(server, worker):
+    """Drop any database connections inherited from the master"""
+    from database import db
+    
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -1,4 +1,5 @@
 from datetime import datetime
+import json
 from database import db
 
 class Job(db.Model):
@@ -8,7 +9,10 @@ class Job(db.Model):
     title = db.Column(db.String(200), nullable=False)
     company = db.Column(db.String(200), nullable=False)
     location = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, nullable=True)
+    # Legacy inline text; new descriptions live in JobDescription (see description_store)
+    _description = db.Column('description', db.Text, nullable=True)
+    description_id = db.Column(db.Integer, db.ForeignKey('job_description.id'), nullable=True, index=True)
+    description_entry = db.relationship('JobDescription', lazy='select')
     salary = db.Column(db.String(100), nullable=True)
     job_type = db.Column(db.String(50), nullable=True)
     experience_level = db.Column(db.String(50), nullable=True)
@@ -16,14 +20,27 @@ class Job(db.Model):
     application_url = db.Column(db.String(500), nullable=True)
     scraped = db.Column(db.Boolean, default=False)
 
-    def to_dict(self):
+    @property
+    def description(self):
+        """Description text, loaded and decompressed on first access"""
+        if self.description_entry is not None:
+            return self.description_entry.text
+        return self._description
+    
+    @description.setter
+    def description(self, text):
+        from description_store import store_description
+        
+        self.description_entry = store_description(text)
+        self._description = None if self.description_entry is not None else text
+
+    def to_dict(self, include_description=False):
         """Convert job object to dictionary for JSON serialization"""
-        return {
+        data = {
             'id': self.id,
             'title': self.title,
             'company': self.company,
             'location': self.location,
-            'description': self.description,
             'salary': self.salary,
             'job_type': self.job_type,
             'experience_level': self.experience_level,
@@ -31,6 +48,68 @@ class Job(db.Model):
             'application_url': self.application_url,
             'scraped': self.scraped
         }
+        if include_description:
+            data['description'] = self.description
+        return data
+    
+    def __repr__(self):
+        return f'<Job {self.title} at {self.company}>'
+
+class DescriptionDictionary(db.Model):
+    """Compression dictionary trained on existing descriptions"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    codec = db.Column(db.String(20), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DescriptionDictionary {self.id} {self.codec} {len(self.data)} bytes>'
+
+class JobDescription(db.Model):
+    """Compressed description text shared by every job with the same content"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    codec = db.Column(db.String(20), nullable=False)
+    dictionary_id = db.Column(db.Integer, db.ForeignKey('description_dictionary.id'), nullable=True)
+    raw_size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    
+    @property
+    def text(self):
+        """Decompressed text, cached on the instance"""
+        text = getattr(self, '_text', None)
+        if text is None:
+            from description_store import decompress
+            
+            text = self._text = decompress(self.codec, self.data, self.dictionary_id)
+        return text
+    
+    def __repr__(self):
+        return f'<JobDescription {self.id} {self.codec} {self.raw_size} bytes>'
+
+class JobChange(db.Model):
+    """Append-only log of job mutations, ordered by seq, for delta sync"""
+    
+    # AUTOINCREMENT keeps seq strictly increasing even if rows are pruned (see prune_changes)
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_id = db.Column(db.Integer, nullable=False, index=True)
+    action = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=True)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert change entry to dictionary for JSON serialization"""
+        return {
+            'seq': self.seq,
+            'job_id': self.job_id,
+            'action': self.action,
+            'job': json.loads(self.payload) if self.payload else None,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
     
     def __repr__(self):
-        return f'<Job {self.title} at {self.company}>'
\ No newline at end of file
+        return f'<JobChange {self.seq} {self.action} job {self.job_id}>'
@@ -1,30 +1,96 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
+from collections import Counter
 from datetime import datetime
 from database import db
 from models import Job
+from sqlalchemy.orm import selectinload
+from change_feed import feed, backfill, changes_pruned_since, format_reset, record_change, get_changes_since, get_latest_seq
+from throttling import check_rate_limit, coalesce
+import queue
+import threading
+import time
 
 api_bp = Blueprint('api', __name__)
+api_bp.before_request(check_rate_limit)
+
+# Query-string parameter -> Job column, shared by every endpoint that filters jobs
+JOB_FILTERS = {
+    'location': Job.location,
+    'company': Job.company,
+    'job_type': Job.job_type,
+    'experience': Job.experience_level,
+}
+
+FACET_FIELDS = ('job_type', 'experience_level', 'company', 'location')
+FACET_CACHE_TTL = 30
+FACET_CACHE_MAX_ENTRIES = 256
+
+_facet_cache = {}
+_facet_cache_lock = threading.Lock()
+# Bumped on every invalidation so a computation that overlapped a write is not cached
+_facet_generation = 0
+
+def get_filter_args():
+    """Read the job filters from the query string, keeping only non-empty ones"""
+    return {name: request.args.get(name, '') for name in JOB_FILTERS if request.args.get(name, '')}
+
+def apply_job_filters(query, filters):
+    """Apply substring filters to a Job query"""
+    for name, value in filters.items():
+        query = query.filter(JOB_FILTERS[name].ilike(f'%{value}%'))
+    return query
+
+def invalidate_facet_cache():
+    """Drop cached facet counts after the jobs table changes"""
+    global _facet_generation
+    with _facet_cache_lock:
+        _facet_generation += 1
+        _facet_cache.clear()
+
+def jobs_changed():
+    """Refresh derived state after a committed change to the jobs table"""
+    invalidate_facet_cache()
+    feed.notify()
+
+def compute_facets(filters, limit):
+    """Count jobs per facet value for the filtered set in a single query"""
+    # One GROUP BY over all facet columns; each row is a distinct combination,
+    # so the per-facet totals are folded together here rather than issuing one
+    # aggregate query per facet
+    columns = [getattr(Job, field) for field in FACET_FIELDS]
+    query = db.session.query(*columns, db.func.count(Job.id)).group_by(*columns)
+    query = apply_job_filters(query, filters)
+    
+    counters = {field: Counter() for field in FACET_FIELDS}
+    total = 0
+    for row in query:
+        count = row[-1]
+        total += count
+        for field, value in zip(FACET_FIELDS, row):
+            counters[field][value] += count
+    
+    return {
+        'total': total,
+        'facets': {
+            field: [{'name': name, 'count': count} for name, count in counter.most_common(limit)]
+            for field, counter in counters.items()
+        }
+    }
 
 @api_bp.route('/jobs', methods=['GET'])
+@coalesce
 def get_jobs():
     """Fetch all job listings with optional filtering and sorting"""
     
-    location_filter = request.args.get('location', '')
-    company_filter = request.args.get('company', '')
-    job_type_filter = request.args.get('job_type', '')
-    experience_filter = request.args.get('experience', '')
     sort_by = request.args.get('sort_by', 'posted_date')
     sort_order = request.args.get('sort_order', 'desc')
-    query = Job.query
+    fields = set(request.args.get('fields', '').split(','))
+    include_description = 'description' in fields
+    query = apply_job_filters(Job.query, get_filter_args())
     
-    if location_filter:
-        query = query.filter(Job.location.ilike(f'%{location_filter}%'))
-    if company_filter:
-        query = query.filter(Job.company.ilike(f'%{company_filter}%'))
-    if job_type_filter:
-        query = query.filter(Job.job_type.ilike(f'%{job_type_filter}%'))
-    if experience_filter:
-        query = query.filter(Job.experience_level.ilike(f'%{experience_filter}%'))
+    # Descriptions are compressed in a separate table; only fetch them on request
+    if include_description:
+        query = query.options(selectinload(Job.description_entry))
     
     if sort_by == 'title':
         order_col = Job.title
@@ -41,7 +107,124 @@ def get_jobs():
         query = query.order_by(order_col.desc())
     
     jobs = query.all()
-    return jsonify([job.to_dict() for job in jobs])
+    return jsonify([job.to_dict(include_description=include_description) for job in jobs])
+
+@api_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@coalesce
+def get_job(job_id):
+    """Fetch a single job listing including its description"""
+    job = Job.query.get_or_404(job_id)
+    return jsonify(job.to_dict(include_description=True))
+
+@api_bp.route('/jobs/facets', methods=['GET'])
+@coalesce
+def get_job_facets():
+    """Get per-facet top-N counts for the jobs matching the current filters"""
+    filters = get_filter_args()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    
+    key = (tuple(sorted(filters.items())), limit)
+    now = time.monotonic()
+    with _facet_cache_lock:
+        cached = _facet_cache.get(key)
+        generation = _facet_generation
+    if cached and now - cached[0] < FACET_CACHE_TTL:
+        return jsonify(cached[1])
+    
+    result = compute_facets(filters, limit)
+    with _facet_cache_lock:
+        # Counts read before a concurrent write committed would otherwise
+        # outlive that write's invalidation for a full TTL
+        if generation == _facet_generation:
+            if len(_facet_cache) >= FACET_CACHE_MAX_ENTRIES:
+                _facet_cache.clear()
+            _facet_cache[key] = (now, result)
+    
+    return jsonify(result)
+
+@api_bp.route('/jobs/changes', methods=['GET'])
+@coalesce
+def get_job_changes():
+    """Fetch change-log entries after a sequence number for delta sync"""
+    since = max(request.args.get('since', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 1000)
+    
+    # Entries after `since` were pruned: the client has to reload /api/jobs
+    # and can then resume from last_seq
+    if changes_pruned_since(since):
+        return jsonify({
+            'error': 'Change log no longer reaches back to since; reload all jobs',
+            'reset': True,
+            'last_seq': get_latest_seq()
+        }), 410
+    
+    changes = get_changes_since(since, limit)
+    
+    return jsonify({
+        'changes': [change.to_dict() for change in changes],
+        'last_seq': changes[-1].seq if changes else since,
+        'has_more': len(changes) == limit
+    })
+
+@api_bp.route('/jobs/changes/stream', methods=['GET'])
+def stream_job_changes():
+    """Push new change-log entries as Server-Sent Events"""
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    if since is None:
+        since = get_latest_seq()
+    reset = changes_pruned_since(since)
+    if reset:
+        since = get_latest_seq()
+    
+    app = current_app._get_current_object()
+    feed.start(app)
+    try:
+        subscriber, attached_seq = feed.subscribe(get_latest_seq(), limit=app.config['CHANGE_STREAM_LIMIT'])
+    except queue.Full:
+        # Each open stream holds a worker thread until the client leaves;
+        # past the cap the rest of the API would have none left
+        return Response('retry: 30000\n\n', status=503, mimetype='text/event-stream', headers={
+            'Retry-After': '30',
+            'Cache-Control': 'no-cache'
+        })
+    
+    def generate(last_seq):
+        yield 'retry: 3000\n\n'
+        if reset:
+            yield format_reset(last_seq)
+        
+        # Catch up from our own query rather than rewinding the shared tail
+        with app.app_context():
+            for seq, frame in backfill(last_seq, attached_seq):
+                last_seq = seq
+                yield frame
+            db.session.remove()
+        
+        while True:
+            try:
+                event = subscriber.get(timeout=15)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                break
+            seq, frame = event
+            if seq <= last_seq:
+                continue
+            last_seq = seq
+            yield frame
+    
+    response = Response(generate(since), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs even if the client leaves before the generator starts, which a
+    # finally block inside it would miss, so the stream slot is always freed
+    response.call_on_close(lambda: feed.unsubscribe(subscriber))
+    return response
 
 @api_bp.route('/jobs', methods=['POST'])
 def add_job():
@@ -62,11 +245,14 @@ def add_job():
         )
         
         db.session.add(new_job)
+        db.session.flush()
+        record_change(new_job, 'created')
         db.session.commit()
+        jobs_changed()
         
         return jsonify({
             'message': 'Job added successfully',
-            'job': new_job.to_dict()
+            'job': new_job.to_dict(include_description=True)
         }), 201
         
     except Exception as e:
@@ -77,8 +263,10 @@ def delete_job(job_id):
     """Delete a specific job listing"""
     try:
         job = Job.query.get_or_404(job_id)
+        record_change(job, 'deleted')
         db.session.delete(job)
         db.session.commit()
+        jobs_changed()
         
         return jsonify({'message': 'Job deleted successfully'}), 200
         
@@ -95,23 +283,27 @@ def update_job(job_id):
         job.title = data.get('title', job.title)
         job.company = data.get('company', job.company)
         job.location = data.get('location', job.location)
-        job.description = data.get('description', job.description)
+        if 'description' in data:
+            job.description = data['description']
         job.salary = data.get('salary', job.salary)
         job.job_type = data.get('job_type', job.job_type)
         job.experience_level = data.get('experience_level', job.experience_level)
         job.application_url = data.get('application_url', job.application_url)
         
+        record_change(job, 'updated')
         db.session.commit()
+        jobs_changed()
         
         return jsonify({
             'message': 'Job updated successfully',
-            'job': job.to_dict()
+            'job': job.to_dict(include_description=True)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 @api_bp.route('/stats', methods=['GET'])
+@coalesce
 def get_stats():
     """Get statistics about job listings"""
     total_jobs = Job.query.count()
@@ -139,46 +331,83 @@ def get_stats():
 @api_bp.route('/scrape', methods=['POST'])
 def trigger_scraping():
     """Trigger the Selenium scraping bot"""
+    # ?profile=1 (or {"profile": true}) records a per-phase trace and profile files
+    options = request.get_json(silent=True) or {}
+    profile = request.args.get('profile', '') in ('1', 'true') or options.get('profile') is True
+    profiler = None
+    
     try:
         from selenium_scraper import JobScraper
+        from scrape_profiler import NullProfiler, ScrapeProfiler
         
-        scraper = JobScraper()
-        scraped_jobs = scraper.scrape_jobs()
+        if profile:
+            profiler = ScrapeProfiler(output_dir=current_app.config['SCRAPE_PROFILE_DIR']).start()
         
-        added_count = 0
-        for job_data in scraped_jobs:
-            existing_job = Job.query.filter_by(
-                title=job_data['title'],
-                company=job_data['company']
-            ).first()
-            
-            if not existing_job:
-                new_job = Job(
-                    title=job_data['title'],
-                    company=job_data['company'],
-                    location=job_data['location'],
-                    description=job_data.get('description', ''),
-                    salary=job_data.get('salary', ''),
-                    job_type=job_data.get('job_type', ''),
-                    experience_level=job_data.get('experience_level', ''),
-                    application_url=job_data.get('application_url', ''),
-                    scraped=True
-                )
-                db.session.add(new_job)
-                added_count += 1
+        scraper = JobScraper(profiler=profiler)
+        scraped_jobs = scraper.scrape_jobs()
         
-        db.session.commit()
+        with (profiler or NullProfiler()).phase('ingest'):
+            new_jobs = ingest_scraped_jobs(scraped_jobs)
         
-        return jsonify({
+        added_count = len(new_jobs)
+        result = {
             'message': f'Scraping completed. Added {added_count} new jobs.',
             'total_scraped': len(scraped_jobs),
             'added': added_count
-        }), 200
+        }
+        
+        if profiler:
+            profiler.stop()
+            result['profile'] = {'report': profiler.report(), 'files': profiler.write()}
+        
+        return jsonify(result), 200
         
     except ImportError:
         return jsonify({'error': 'Selenium scraper not available'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        if profiler:
+            profiler.stop()
+
+def ingest_scraped_jobs(scraped_jobs):
+    """Insert scraped jobs that are not already stored; returns the new Job rows"""
+    new_jobs = []
+    for job_data in scraped_jobs:
+        existing_job = Job.query.filter_by(
+            title=job_data['title'],
+            company=job_data['company']
+        ).first()
+        
+        if not existing_job:
+            new_job = Job(
+                title=job_data['title'],
+                company=job_data['company'],
+                location=job_data['location'],
+                description=job_data.get('description', ''),
+                salary=job_data.get('salary', ''),
+                job_type=job_data.get('job_type', ''),
+                experience_level=job_data.get('experience_level', ''),
+                application_url=job_data.get('application_url', ''),
+                scraped=True
+            )
+            db.session.add(new_job)
+            new_jobs.append(new_job)
+    
+    if new_jobs:
+        db.session.flush()
+        for new_job in new_jobs:
+            record_change(new_job, 'created')
+    db.session.commit()
+    if new_jobs:
+        jobs_changed()
+    
+    return new_jobs
+
+@api_bp.route('/throttle/stats', methods=['GET'])
+def get_throttle_stats():
+    """Get rejected and coalesced request counters"""
+    return jsonify(current_app.extensions['throttle'].stats())
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
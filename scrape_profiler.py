@@ -0,0 +1,269 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+CATEGORIES = ('wall', 'cpu', 'sleep', 'webdriver', 'other')
+
+class Span:
+    """One timed phase of a scraper run"""
+    
+    def __init__(self, name, depth, start, cpu_start):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.cpu_start = cpu_start
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.sleep = 0.0
+        self.webdriver = 0.0
+    
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'start': round(self.start - origin, 6),
+            'wall': round(self.wall, 6),
+            'cpu': round(self.cpu, 6),
+            'sleep': round(self.sleep, 6),
+            'webdriver': round(self.webdriver, 6),
+            'other': round(max(self.wall - self.cpu - self.sleep - self.webdriver, 0), 6)
+        }
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is a no-op"""
+    
+    @contextmanager
+    def phase(self, name):
+        yield
+    
+    @contextmanager
+    def sleeping(self):
+        yield
+    
+    def instrument_driver(self, driver):
+        return driver
+
+class ScrapeProfiler:
+    """Per-phase timing trace and sampled profile for one scraper run.
+    
+    Each phase records wall time, CPU time of the scraping thread, time spent
+    in intentional sleeps and time blocked on WebDriver commands. Whatever is
+    left (mostly WebDriverWait polling sleeps) is reported as `other`. While
+    running, cProfile and a stack sampler are active so the run can be written
+    out as pstats and speedscope files.
+    """
+    
+    def __init__(self, output_dir=None, sample_interval=0.005):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.spans = []
+        self.stack = []
+        self.origin = None
+        self.profile = cProfile.Profile()
+        self.samples = []
+        self.sampler = None
+        self.stopped = threading.Event()
+        self.thread_id = None
+    
+    def start(self):
+        """Start timing and profiling the calling thread"""
+        self.origin = time.perf_counter()
+        self.thread_id = threading.get_ident()
+        self.stopped.clear()
+        self.sampler = threading.Thread(target=self._sample, name='scrape-sampler', daemon=True)
+        self.sampler.start()
+        self.profile.enable()
+        return self
+    
+    def stop(self):
+        """Stop profiling; open phases are closed first"""
+        self.profile.disable()
+        self.stopped.set()
+        if self.sampler:
+            self.sampler.join()
+        while self.stack:
+            self._close(self.stack[-1], *self._clock())
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def _clock(self):
+        return time.perf_counter(), time.thread_time()
+    
+    def _close(self, span, wall_end, cpu_end):
+        span.wall = wall_end - span.start
+        span.cpu = cpu_end - span.cpu_start
+        self.stack.remove(span)
+    
+    @contextmanager
+    def phase(self, name):
+        """Time a named phase; phases nest"""
+        wall, cpu = self._clock()
+        span = Span(name, len(self.stack), wall, cpu)
+        self.spans.append(span)
+        self.stack.append(span)
+        try:
+            yield span
+        finally:
+            if span in self.stack:
+                self._close(span, *self._clock())
+    
+    def _charge(self, attribute, seconds):
+        for span in self.stack:
+            setattr(span, attribute, getattr(span, attribute) + seconds)
+    
+    @contextmanager
+    def sleeping(self):
+        """Mark the enclosed block as an intentional delay"""
+        with self.phase('sleep'):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._charge('sleep', time.perf_counter() - start)
+    
+    def instrument_driver(self, driver):
+        """Time every WebDriver command issued through this driver"""
+        execute = getattr(driver, 'execute', None)
+        if execute is None:
+            # Fake drivers (see scrape_replay) do no WebDriver I/O to time
+            return driver
+        
+        def timed_execute(driver_command, params=None):
+            wall, cpu = self._clock()
+            try:
+                return execute(driver_command, params)
+            finally:
+                # Only the blocked part counts as WebDriver I/O; the client's
+                # own request building and JSON decoding stays in cpu
+                wall_end, cpu_end = self._clock()
+                self._charge('webdriver', max((wall_end - wall) - (cpu_end - cpu), 0))
+        
+        # WebElement methods call back into driver.execute, so this covers them too
+        driver.execute = timed_execute
+        return driver
+    
+    def _sample(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.sample_interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((stack, now - last))
+            last = now
+    
+    def report(self):
+        """Summarize the run: totals by category and per-phase aggregates"""
+        totals = dict.fromkeys(CATEGORIES, 0.0)
+        phases = defaultdict(lambda: dict(dict.fromkeys(CATEGORIES, 0.0), count=0))
+        
+        for span in self.trace():
+            entry = phases[span['name']]
+            entry['count'] += 1
+            for key in CATEGORIES:
+                entry[key] = round(entry[key] + span[key], 6)
+                if span['depth'] == 0:
+                    totals[key] = round(totals[key] + span[key], 6)
+        
+        return {'totals': totals, 'phases': dict(phases)}
+    
+    def trace(self):
+        """Every recorded phase in start order"""
+        return [span.to_dict(self.origin) for span in self.spans]
+    
+    def speedscope(self, name='scrape'):
+        """Build a speedscope file with the phase timeline and the sampled stacks"""
+        frames = []
+        frame_index = {}
+        
+        def index(key, **frame):
+            if key not in frame_index:
+                frame_index[key] = len(frames)
+                frames.append(frame)
+            return frame_index[key]
+        
+        # Phases as an evented profile. Spans are recorded in start order and
+        # nest strictly, so closing every deeper-or-equal open span before
+        # opening the next one yields balanced events
+        events = []
+        open_spans = []
+        
+        def close(span):
+            frame = index(('phase', span.name), name=span.name)
+            events.append({'type': 'C', 'frame': frame, 'at': span.start - self.origin + span.wall})
+        
+        for span in self.spans:
+            while open_spans and open_spans[-1].depth >= span.depth:
+                close(open_spans.pop())
+            frame = index(('phase', span.name), name=span.name)
+            events.append({'type': 'O', 'frame': frame, 'at': span.start - self.origin})
+            open_spans.append(span)
+        while open_spans:
+            close(open_spans.pop())
+        end = max((e['at'] for e in events), default=0)
+        
+        samples = []
+        weights = []
+        for stack, weight in self.samples:
+            samples.append([index(('code',) + key, name=key[0], file=key[1], line=key[2]) for key in stack])
+            weights.append(weight)
+        
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'scrape_profiler',
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'evented',
+                    'name': f'{name} phases',
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': end,
+                    'events': events
+                },
+                {
+                    'type': 'sampled',
+                    'name': f'{name} samples',
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': sum(weights),
+                    'samples': samples,
+                    'weights': weights
+                }
+            ]
+        }
+    
+    def write(self, output_dir=None):
+        """Write trace JSON, pstats and speedscope files; returns their paths"""
+        output_dir = output_dir or self.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.join(output_dir, f"scrape-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}")
+        
+        paths = {
+            'trace': f'{stem}.trace.json',
+            'pstats': f'{stem}.pstats',
+            'speedscope': f'{stem}.speedscope.json'
+        }
+        with open(paths['trace'], 'w') as f:
+            json.dump({'report': self.report(), 'phases': self.trace()}, f, indent=2)
+        self.profile.dump_stats(paths['pstats'])
+        with open(paths['speedscope'], 'w') as f:
+            json.dump(self.speedscope(), f)
+        return paths
@@ -0,0 +1,374 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr'
+}
+HIDDEN_ELEMENTS = {'script', 'style', 'template', 'noscript', 'head', 'title'}
+# Selenium returns these attributes as resolved properties, i.e. absolute URLs
+URL_ATTRIBUTES = {'href', 'src', 'action'}
+
+class Node:
+    """An element of a parsed fixture page"""
+    
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+    
+    @property
+    def classes(self):
+        return self.attrs.get('class', '').split()
+    
+    def descendants(self):
+        """Yield descendant elements in document order"""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.descendants()
+    
+    def text_content(self):
+        parts = []
+        for child in self.children:
+            if isinstance(child, Node):
+                if child.tag not in HIDDEN_ELEMENTS:
+                    parts.append(child.text_content())
+            else:
+                parts.append(child)
+        return ' '.join(parts)
+
+class TreeBuilder(HTMLParser):
+    """Build a Node tree, tolerating the unclosed tags real pages contain"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', {})
+        self.stack = [self.root]
+    
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value or '' for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(node)
+    
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {name: value or '' for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(node)
+    
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+    
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+def parse_html(html):
+    """Parse a page into a Node tree and return its document root"""
+    builder = TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+COMPOUND_TOKEN = re.compile(r'''
+    (?P<tag>^(?:\*|[a-zA-Z][\w-]*))
+  | \.(?P<cls>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~^$*|]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[^\]\s]+)))?\s*\]
+''', re.VERBOSE)
+
+def split_outside_brackets(selector, separators):
+    """Split a selector on separator characters that are not inside [...] or quotes"""
+    parts, current, depth, quote = [], '', 0, None
+    for char in selector:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in '"\'':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif depth == 0 and char in separators:
+            parts.append(current)
+            parts.append(char)
+            current = ''
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+def parse_compound(text, selector):
+    """Parse one compound selector (e.g. `a.jobTitle[data-jk]`) into tests"""
+    tests, pos = [], 0
+    while pos < len(text):
+        match = COMPOUND_TOKEN.match(text, pos)
+        if not match or match.end() == pos or (match.group('tag') and pos != 0):
+            raise InvalidSelectorException(f"Unsupported CSS selector in replay driver: {selector}")
+        if match.group('tag'):
+            tests.append(('tag', match.group('tag').lower()))
+        elif match.group('cls'):
+            tests.append(('class', match.group('cls')))
+        elif match.group('id'):
+            tests.append(('attr', 'id', '=', match.group('id')))
+        else:
+            value = next((v for v in match.group('dq', 'sq', 'bare') if v is not None), None)
+            tests.append(('attr', match.group('attr').lower(), match.group('op'), value))
+        pos = match.end()
+    return tests
+
+def parse_selector(selector):
+    """Parse a selector group into lists of (combinator, compound tests), rightmost last"""
+    groups = []
+    for group in split_outside_brackets(selector, ','):
+        if group == ',':
+            continue
+        # Normalise '>' so it splits as its own token
+        tokens = [t for t in split_outside_brackets(group.replace('>', ' > '), ' \t\n') if t.strip()]
+        steps, combinator = [], ' '
+        for token in tokens:
+            if token == '>':
+                combinator = '>'
+                continue
+            steps.append((combinator, parse_compound(token, selector)))
+            combinator = ' '
+        if not steps:
+            raise InvalidSelectorException(f"Empty CSS selector: {selector}")
+        groups.append(steps)
+    return groups
+
+def matches_compound(node, tests):
+    for test in tests:
+        if test[0] == 'tag':
+            if test[1] != '*' and node.tag != test[1]:
+                return False
+        elif test[0] == 'class':
+            if test[1] not in node.classes:
+                return False
+        else:
+            _, name, op, value = test
+            actual = node.attrs.get(name)
+            if actual is None:
+                return False
+            if op == '=' and actual != value:
+                return False
+            if op == '~=' and value not in actual.split():
+                return False
+            if op == '^=' and not actual.startswith(value):
+                return False
+            if op == '$=' and not actual.endswith(value):
+                return False
+            if op == '*=' and value not in actual:
+                return False
+            if op == '|=' and actual != value and not actual.startswith(value + '-'):
+                return False
+    return True
+
+def matches_steps(node, steps):
+    """Match right to left; ancestors may lie outside the search scope, as in querySelectorAll"""
+    combinator, tests = steps[-1]
+    if not isinstance(node, Node) or node.tag == '#document' or not matches_compound(node, tests):
+        return False
+    if len(steps) == 1:
+        return True
+    parent = node.parent
+    if combinator == '>':
+        return matches_steps(parent, steps[:-1])
+    while parent is not None:
+        if matches_steps(parent, steps[:-1]):
+            return True
+        parent = parent.parent
+    return False
+
+def select(scope, by, value):
+    """Find elements under a node, in document order"""
+    if by == By.CSS_SELECTOR:
+        groups = parse_selector(value)
+    elif by == By.TAG_NAME:
+        groups = [[(' ', [('tag', value.lower())])]]
+    elif by == By.CLASS_NAME:
+        groups = [[(' ', [('class', value)])]]
+    elif by == By.ID:
+        groups = [[(' ', [('attr', 'id', '=', value)])]]
+    else:
+        raise InvalidSelectorException(f"Replay driver does not support locator strategy: {by}")
+    return [node for node in scope.descendants() if any(matches_steps(node, steps) for steps in groups)]
+
+class ReplayElement:
+    """WebElement stand-in backed by a parsed fixture node"""
+    
+    def __init__(self, driver, node):
+        self.driver = driver
+        self.node = node
+    
+    @property
+    def tag_name(self):
+        return self.node.tag
+    
+    @property
+    def text(self):
+        # Selenium returns rendered text; collapsing whitespace is close enough
+        # for the single-line fields the scraper reads
+        return ' '.join(self.node.text_content().split())
+    
+    def get_attribute(self, name):
+        value = self.node.attrs.get(name)
+        if value is not None and name in URL_ATTRIBUTES:
+            return urljoin(self.driver.current_url, value)
+        return value
+    
+    def find_element(self, by=By.ID, value=None):
+        return self.driver._first(self.node, by, value)
+    
+    def find_elements(self, by=By.ID, value=None):
+        return [ReplayElement(self.driver, node) for node in select(self.node, by, value)]
+
+class ReplayDriver:
+    """Fake WebDriver that serves recorded pages instead of launching Chrome.
+    
+    Implements the part of the WebDriver API JobScraper uses (get,
+    find_element(s), execute_script and element text/attributes) so the
+    scrape -> clean -> ingest pipeline can run offline and deterministically.
+    Pages come from a fixture directory written by record_fixtures().
+    
+    URLs missing from the fixtures are collected in `missing`. By default an
+    empty page is served for them; with strict=True get() raises instead.
+    """
+    
+    def __init__(self, fixture_dir, strict=False):
+        self.fixture_dir = fixture_dir
+        self.strict = strict
+        self.missing = []
+        with open(os.path.join(fixture_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.current_url = 'about:blank'
+        self.page_source = '<html><body></body></html>'
+        self.document = parse_html(self.page_source)
+        self.scroll_height = 0
+        # Parsed pages are reused when a benchmark replays the same URL again
+        self.cache = {}
+    
+    def get(self, url):
+        self.current_url = url
+        page = self.manifest['pages'].get(url)
+        if page is None:
+            self.missing.append(url)
+            if self.strict:
+                raise WebDriverException(f"Replay: no recorded page for {url}")
+            logger.warning(f"No recorded page for {url}; serving an empty document")
+            self.page_source = '<html><body></body></html>'
+            self.document = parse_html(self.page_source)
+            self.scroll_height = 0
+            return
+        
+        if url not in self.cache:
+            with open(os.path.join(self.fixture_dir, page['file']), encoding='utf-8') as f:
+                source = f.read()
+            self.cache[url] = (source, parse_html(source))
+        self.page_source, self.document = self.cache[url]
+        self.scroll_height = page.get('scroll_height', 0)
+    
+    def _first(self, scope, by, value):
+        nodes = select(scope, by, value)
+        if not nodes:
+            raise NoSuchElementException(f"Replay: no element matches {value!r}")
+        return ReplayElement(self, nodes[0])
+    
+    def find_element(self, by=By.ID, value=None):
+        return self._first(self.document, by, value)
+    
+    def find_elements(self, by=By.ID, value=None):
+        return [ReplayElement(self, node) for node in select(self.document, by, value)]
+    
+    def execute_script(self, script, *args):
+        # Only scrollHeight is read back; scrolling and property overrides are no-ops
+        if 'scrollHeight' in script:
+            return self.scroll_height
+        return None
+    
+    def implicitly_wait(self, seconds):
+        pass
+    
+    def quit(self):
+        pass
+
+def record_fixtures(fixture_dir, search_term="software engineer", location="", max_pages=2, headless=True):
+    """Scrape Indeed through real Chrome and save every loaded page to fixture_dir.
+    
+    A page is saved as it looked when the scraper read its job cards, i.e.
+    after the delays, scrolling and waits that let it load. The jobs the live
+    run extracted are stored in the manifest so replays can be checked
+    against them.
+    """
+    from selenium_scraper import JobScraper
+    
+    os.makedirs(fixture_dir, exist_ok=True)
+    manifest = {
+        'search_term': search_term,
+        'location': location,
+        'max_pages': max_pages,
+        'pages': {},
+        'jobs': None
+    }
+    
+    scraper = JobScraper(headless=headless)
+    driver = scraper.driver
+    driver_get, driver_find_elements = driver.get, driver.find_elements
+    loaded = {'url': None}
+    
+    def save_page():
+        url = loaded['url']
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.html'
+        with open(os.path.join(fixture_dir, name), 'w', encoding='utf-8') as f:
+            f.write(driver.page_source)
+        manifest['pages'][url] = {
+            'file': name,
+            'scroll_height': driver.execute_script("return document.body.scrollHeight")
+        }
+    
+    def recording_get(url):
+        driver_get(url)
+        loaded['url'] = url
+        # Kept if the scraper gives up on the page before looking for cards
+        save_page()
+        logger.info(f"Recorded {url}")
+    
+    def recording_find_elements(*args, **kwargs):
+        elements = driver_find_elements(*args, **kwargs)
+        # Only the card probe searches the whole page; the last probe is what
+        # extraction ran on, so each one replaces the page saved so far
+        if loaded['url'] is not None:
+            save_page()
+        return elements
+    
+    driver.get = recording_get
+    driver.find_elements = recording_find_elements
+    try:
+        jobs = scraper.scrape_indeed_jobs(search_term, location, max_pages)
+        manifest['jobs'] = scraper.clean_and_deduplicate_jobs(jobs)
+    finally:
+        scraper.close()
+        with open(os.path.join(fixture_dir, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+    
+    return jobs
+
+def replay_scraper(driver, profiler=None):
+    """Build a JobScraper on a ReplayDriver with every delay and wait disabled"""
+    from selenium_scraper import JobScraper
+    
+    return JobScraper(driver=driver, delays=False, wait_timeout=0, profiler=profiler)
@@ -8,15 +8,24 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import logging
 import re
+from scrape_profiler import NullProfiler
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class JobScraper:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, profiler=None, driver=None, delays=True, wait_timeout=10):
         self.headless = headless
         self.driver = None
-        self.setup_driver()
+        # Pass a ScrapeProfiler to record per-phase timings for this scraper
+        self.profiler = profiler or NullProfiler()
+        # Replay runs (see scrape_replay) pass their own driver, no delays and no waits
+        self.delays = delays
+        self.wait_timeout = wait_timeout
+        with self.profiler.phase("setup_driver"):
+            if driver is not None:
+                self.driver = self.profiler.instrument_driver(driver)
+            else:
+                self.setup_driver()
     
     def setup_driver(self):
         """Setup Chrome driver with enhanced anti-detection options"""
@@ -41,7 +50,7 @@ class JobScraper:
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = self.profiler.instrument_driver(webdriver.Chrome(options=chrome_options))
             
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
@@ -54,27 +63,31 @@ class JobScraper:
     
     def human_like_delay(self, min_delay=1, max_delay=3):
         """Add human-like random delays"""
+        if not self.delays:
+            return
         delay = random.uniform(min_delay, max_delay)
-        time.sleep(delay)
+        with self.profiler.sleeping():
+            time.sleep(delay)
     
     def scroll_page(self):
         """Simulate human-like scrolling"""
-        try:
-            # Get page height
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            
-            # Scroll down in chunks
-            for i in range(3):
-                # Scroll down
-                self.driver.execute_script(f"window.scrollTo(0, {(i + 1) * (last_height // 4)});")
-                self.human_like_delay(0.5, 1.5)
-            
-            # Scroll back to top
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            self.human_like_delay(1, 2)
-            
-        except Exception as e:
-            logger.warning(f"Error during scrolling: {e}")
+        with self.profiler.phase("scroll_page"):
+            try:
+                # Get page height
+                last_height = self.driver.execute_script("return document.body.scrollHeight")
+                
+                # Scroll down in chunks
+                for i in range(3):
+                    # Scroll down
+                    self.driver.execute_script(f"window.scrollTo(0, {(i + 1) * (last_height // 4)});")
+                    self.human_like_delay(0.5, 1.5)
+                
+                # Scroll back to top
+                self.driver.execute_script("window.scrollTo(0, 0);")
+                self.human_like_delay(1, 2)
+                
+            except Exception as e:
+                logger.warning(f"Error during scrolling: {e}")
     
     def scrape_indeed_jobs(self, search_term="software engineer", location="", max_pages=2):
         """Scrape jobs from Indeed with updated selectors and better error handling"""
@@ -91,62 +104,67 @@ class JobScraper:
                 
                 logger.info(f"Scraping Indeed page {page + 1}: {url}")
                 
-                try:
-                    self.driver.get(url)
-                    self.human_like_delay(3, 5)
-                    
-                    # Scroll to load content
-                    self.scroll_page()
-                    
-                    # Wait for job cards with multiple possible selectors
-                    job_cards = None
-                    selectors_to_try = [
-                        '[data-jk]',
-                        '.job_seen_beacon',
-                        '.jobsearch-SerpJobCard',
-                        '.slider_container .slider_item',
-                        '[data-testid="job-card"]'
-                    ]
-                    
-                    for selector in selectors_to_try:
-                        try:
-                            WebDriverWait(self.driver, 10).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                            )
-                            job_cards = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                            if job_cards:
-                                logger.info(f"Found {len(job_cards)} job cards using selector: {selector}")
-                                break
-                        except TimeoutException:
+                with self.profiler.phase("page"):
+                    try:
+                        with self.profiler.phase("driver.get"):
+                            self.driver.get(url)
+                        self.human_like_delay(3, 5)
+                        
+                        # Scroll to load content
+                        self.scroll_page()
+                        
+                        # Wait for job cards with multiple possible selectors
+                        job_cards = None
+                        selectors_to_try = [
+                            '[data-jk]',
+                            '.job_seen_beacon',
+                            '.jobsearch-SerpJobCard',
+                            '.slider_container .slider_item',
+                            '[data-testid="job-card"]'
+                        ]
+                        
+                        with self.profiler.phase("probe_selectors"):
+                            for selector in selectors_to_try:
+                                try:
+                                    if self.wait_timeout:
+                                        WebDriverWait(self.driver, self.wait_timeout).until(
+                                            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                                        )
+                                    job_cards = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                                    if job_cards:
+                                        logger.info(f"Found {len(job_cards)} job cards using selector: {selector}")
+                                        break
+                                except TimeoutException:
+                                    continue
+                        
+                        if not job_cards:
+                            logger.warning(f"No job cards found on page {page + 1}")
                             continue
-                    
-                    if not job_cards:
-                        logger.warning(f"No job cards found on page {page + 1}")
-                        continue
-                    
-                    # Extract job data
-                    for i, card in enumerate(job_cards[:15]):  # Limit to avoid being blocked
-                        try:
-                            job_data = self.extract_indeed_job_data(card)
-                            if job_data and job_data.get('title'):
-                                jobs.append(job_data)
-                                logger.info(f"Extracted job {i+1}: {job_data['title']}")
-                            
-                            # Small delay between extractions
-                            if i % 5 == 0:
-                                self.human_like_delay(0.5, 1)
+                        
+                        # Extract job data
+                        for i, card in enumerate(job_cards[:15]):  # Limit to avoid being blocked
+                            try:
+                                with self.profiler.phase("extract_indeed_job_data"):
+                                    job_data = self.extract_indeed_job_data(card)
+                                if job_data and job_data.get('title'):
+                                    jobs.append(job_data)
+                                    logger.info(f"Extracted job {i+1}: {job_data['title']}")
                                 
-                        except Exception as e:
-                            logger.warning(f"Error extracting job {i+1}: {e}")
-                            continue
-                    
-                    # Longer delay between pages
-                    if page < max_pages - 1:
-                        self.human_like_delay(5, 8)
+                                # Small delay between extractions
+                                if i % 5 == 0:
+                                    self.human_like_delay(0.5, 1)
+                                    
+                            except Exception as e:
+                                logger.warning(f"Error extracting job {i+1}: {e}")
+                                continue
                         
-                except Exception as e:
-                    logger.error(f"Error on Indeed page {page + 1}: {e}")
-                    continue
+                        # Longer delay between pages
+                        if page < max_pages - 1:
+                            self.human_like_delay(5, 8)
+                            
+                    except Exception as e:
+                        logger.error(f"Error on Indeed page {page + 1}: {e}")
+                        continue
         
         except Exception as e:
             logger.error(f"Error scraping Indeed: {e}")
@@ -379,31 +397,33 @@ class JobScraper:
         if use_sample:
             return self.scrape_sample_jobs()
         
-        try:
-            logger.info("Starting job scraping...")
-            logger.info(f"Search term: {search_term}, Location: {location}")
-            
-            # Try to scrape from Indeed
-            logger.info("Attempting to scrape from Indeed...")
-            indeed_jobs = self.scrape_indeed_jobs(search_term, location, max_pages)
-            
-            if indeed_jobs:
-                all_jobs.extend(indeed_jobs)
-                logger.info(f"Successfully scraped {len(indeed_jobs)} jobs from Indeed")
-            else:
-                logger.warning("No jobs found from Indeed, using sample data")
+        with self.profiler.phase("scrape_jobs"):
+            try:
+                logger.info("Starting job scraping...")
+                logger.info(f"Search term: {search_term}, Location: {location}")
+                
+                # Try to scrape from Indeed
+                logger.info("Attempting to scrape from Indeed...")
+                indeed_jobs = self.scrape_indeed_jobs(search_term, location, max_pages)
+                
+                if indeed_jobs:
+                    all_jobs.extend(indeed_jobs)
+                    logger.info(f"Successfully scraped {len(indeed_jobs)} jobs from Indeed")
+                else:
+                    logger.warning("No jobs found from Indeed, using sample data")
+                    all_jobs = self.scrape_sample_jobs()
+                
+            except Exception as e:
+                logger.error(f"Error during scraping: {e}")
+                logger.info("Falling back to sample data due to scraping error")
                 all_jobs = self.scrape_sample_jobs()
             
-        except Exception as e:
-            logger.error(f"Error during scraping: {e}")
-            logger.info("Falling back to sample data due to scraping error")
-            all_jobs = self.scrape_sample_jobs()
-        
-        # Remove duplicates and clean data
-        unique_jobs = self.clean_and_deduplicate_jobs(all_jobs)
-        
-        logger.info(f"Total unique jobs processed: {len(unique_jobs)}")
-        return unique_jobs
+            # Remove duplicates and clean data
+            with self.profiler.phase("clean_and_deduplicate_jobs"):
+                unique_jobs = self.clean_and_deduplicate_jobs(all_jobs)
+            
+            logger.info(f"Total unique jobs processed: {len(unique_jobs)}")
+            return unique_jobs
     
     def clean_and_deduplicate_jobs(self, jobs):
         """Clean job data and remove duplicates"""
@@ -456,6 +476,7 @@ class JobScraper:
 
 # Test the scraper
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     scraper = JobScraper(headless=True)  # Set to False for debugging
     
     try:
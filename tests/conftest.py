@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from database import init_db
+
+@pytest.fixture
+def make_app():
+    """Build an app on a fresh in-memory database, with extra config applied"""
+    def factory(**config):
+        app = create_app(dict({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True}, **config))
+        with app.app_context():
+            init_db(seed=False)
+        return app
+    return factory
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
@@ -0,0 +1,161 @@
+import json
+import queue
+from datetime import datetime, timedelta
+import pytest
+import routes
+from change_feed import ChangeFeed, get_latest_seq, get_oldest_seq, prune_changes
+from database import db
+from models import JobChange
+
+def add_jobs(client, count, start=0):
+    for i in range(start, start + count):
+        response = client.post('/api/jobs', json={'title': f'Job {i}', 'company': 'Acme', 'location': 'Remote'})
+        assert response.status_code == 201, response.get_json()
+
+def read_events(response, count):
+    """Read the first `count` SSE frames (comments and retry lines excluded)"""
+    frames = []
+    for chunk in response.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith(('id:', 'event:')):
+            frames.append(dict(line.split(': ', 1) for line in chunk.strip().splitlines()))
+        if len(frames) == count:
+            break
+    response.close()
+    return frames
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    # The feed's tail thread queries concurrently with requests, which the
+    # single shared connection of an in-memory database cannot take
+    return make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "jobs.db"}')
+
+@pytest.fixture(autouse=True)
+def feed(monkeypatch):
+    """A fresh per-test feed; the process-wide one keeps its cursor across databases"""
+    feed = ChangeFeed(poll_interval=0.05)
+    monkeypatch.setattr(routes, 'feed', feed)
+    return feed
+
+@pytest.fixture
+def pruned_app(app):
+    """An app whose log held seqs 1-5 and was pruned down to 4-5"""
+    client = app.test_client()
+    add_jobs(client, 5)
+    with app.app_context():
+        JobChange.query.filter(JobChange.seq <= 3).update({'changed_at': datetime.utcnow() - timedelta(days=30)})
+        db.session.commit()
+        assert prune_changes(datetime.utcnow() - timedelta(days=7)) == 3
+        assert get_oldest_seq() == 4
+    return app
+
+def test_prune_keeps_newest_entry(app):
+    add_jobs(app.test_client(), 2)
+    with app.app_context():
+        assert prune_changes(datetime.utcnow() + timedelta(days=1)) == 1
+        assert [change.seq for change in JobChange.query] == [2]
+
+def test_changes_behind_pruned_log_ask_for_reset(pruned_app):
+    client = pruned_app.test_client()
+    
+    for since in (0, 2):
+        response = client.get(f'/api/jobs/changes?since={since}')
+        assert response.status_code == 410
+        assert response.get_json()['reset'] is True
+        assert response.get_json()['last_seq'] == 5
+    
+    response = client.get('/api/jobs/changes?since=3')
+    assert response.status_code == 200
+    assert [change['seq'] for change in response.get_json()['changes']] == [4, 5]
+
+def test_stream_behind_pruned_log_sends_reset(pruned_app):
+    client = pruned_app.test_client()
+    
+    frames = read_events(client.get('/api/jobs/changes/stream', headers={'Last-Event-ID': '1'}), 1)
+    assert frames[0]['event'] == 'reset'
+    assert frames[0]['id'] == '5'
+    assert json.loads(frames[0]['data']) == {'reset': True, 'last_seq': 5}
+
+def test_stream_limit_rejects_extra_subscribers(app):
+    app.config['CHANGE_STREAM_LIMIT'] = 1
+    client = app.test_client()
+    
+    first = client.get('/api/jobs/changes/stream')
+    second = client.get('/api/jobs/changes/stream')
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == '30'
+    assert second.get_data(as_text=True).startswith('retry:')
+    
+    # Closing a stream, even one never read from, frees its slot
+    first.close()
+    third = client.get('/api/jobs/changes/stream')
+    assert third.status_code == 200
+    third.close()
+
+def test_change_payload_carries_description(app):
+    client = app.test_client()
+    job_id = client.post('/api/jobs', json={'title': 'A', 'company': 'Acme', 'location': 'Remote',
+                                            'description': 'First text'}).get_json()['job']['id']
+    client.put(f'/api/jobs/{job_id}', json={'description': 'Edited text'})
+    client.delete(f'/api/jobs/{job_id}')
+    
+    changes = client.get('/api/jobs/changes').get_json()['changes']
+    assert [(c['action'], c['job'] and c['job']['description']) for c in changes] == [
+        ('created', 'First text'), ('updated', 'Edited text'), ('deleted', None)
+    ]
+
+def test_changes_are_paged(app):
+    client = app.test_client()
+    add_jobs(client, 5)
+    
+    pages, since, has_more = [], 0, True
+    while has_more:
+        page = client.get(f'/api/jobs/changes?since={since}&limit=2').get_json()
+        pages.append([change['seq'] for change in page['changes']])
+        since, has_more = page['last_seq'], page['has_more']
+    
+    assert pages == [[1, 2], [3, 4], [5]]
+    assert since == 5
+    assert client.get('/api/jobs/changes?since=5').get_json() == {'changes': [], 'last_seq': 5, 'has_more': False}
+
+def test_stream_behind_the_tail_is_backfilled(app, feed):
+    client = app.test_client()
+    add_jobs(client, 3)
+    
+    live = client.get('/api/jobs/changes/stream')
+    behind = client.get('/api/jobs/changes/stream', headers={'Last-Event-ID': '1'})
+    assert feed.last_seq == 3
+    add_jobs(client, 1, start=3)
+    
+    assert [frame['id'] for frame in read_events(behind, 3)] == ['2', '3', '4']
+    # The live subscriber's first event is the new one: backfilling the
+    # other stream did not rewind the shared tail into replaying 2 and 3
+    assert [frame['id'] for frame in read_events(live, 1)] == ['4']
+    assert feed.subscribers == set()
+
+def test_feed_publishes_each_entry_once(app, feed):
+    client = app.test_client()
+    add_jobs(client, 2)
+    feed.start(app)
+    
+    with app.app_context():
+        first, first_seq = feed.subscribe(get_latest_seq())
+        add_jobs(client, 2, start=2)
+        feed.notify()
+        assert [first.get(timeout=2)[0] for _ in range(2)] == [3, 4]
+        
+        # A later subscriber that wants history from seq 1 attaches at the
+        # tail, never before it; the caller backfills the rest itself
+        second, second_seq = feed.subscribe(1)
+        assert (first_seq, second_seq) == (2, 4)
+        
+        add_jobs(client, 1, start=4)
+        assert first.get(timeout=2)[0] == 5
+        assert second.get(timeout=2)[0] == 5
+        with pytest.raises(queue.Empty):
+            first.get(timeout=0.2)
+        assert second.empty()
+        assert feed.last_seq == 5
+        
+        feed.unsubscribe(first)
+        feed.unsubscribe(second)
@@ -0,0 +1,181 @@
+import pytest
+import description_store
+from database import db
+from description_store import (
+    build_zlib_dictionary, compress, decompress, migrate_descriptions, prune_descriptions,
+    space_report, store_description, train_dictionary
+)
+from models import DescriptionDictionary, Job, JobDescription
+
+BOILERPLATE = (
+    "We are an equal opportunity employer and value diversity at our company. "
+    "We offer competitive salary, health insurance and a flexible remote work policy. "
+)
+
+def descriptions(count):
+    return [f"Role {i}: build and maintain service number {i}.\n{BOILERPLATE}" for i in range(count)]
+
+def make_job(title, **fields):
+    return Job(title=title, company='Acme', location='Remote', **fields)
+
+@pytest.fixture(autouse=True)
+def clear_dictionary_cache():
+    # Every test's in-memory database numbers its dictionaries from 1 again
+    description_store.reset_caches()
+    yield
+    description_store.reset_caches()
+
+@pytest.mark.parametrize('codec', ['zlib', 'raw'])
+def test_round_trip_without_dictionary(app, codec):
+    text = descriptions(1)[0]
+    with app.app_context():
+        assert decompress(codec, compress(codec, text.encode('utf-8'))) == text
+
+def test_zlib_dictionary_round_trip_and_gain(app):
+    samples = descriptions(30)
+    zdict = build_zlib_dictionary(samples)
+    assert BOILERPLATE.split('. ')[0].encode() in zdict
+    
+    with app.app_context():
+        dictionary = DescriptionDictionary(codec='zlib', data=zdict)
+        db.session.add(dictionary)
+        db.session.commit()
+        
+        raw = samples[0].encode('utf-8')
+        data = compress('zlib', raw, dictionary.id)
+        assert len(data) < len(compress('zlib', raw))
+        assert decompress('zlib', data, dictionary.id) == samples[0]
+
+@pytest.mark.skipif(description_store.zstandard is None, reason='zstandard is not installed')
+def test_zstd_dictionary_round_trip(app):
+    samples = descriptions(200)
+    with app.app_context():
+        dictionary = train_dictionary(samples, codec='zstd')
+        if dictionary is None:
+            pytest.skip('zstd could not train a dictionary from the samples')
+        db.session.commit()
+        
+        data = compress('zstd', samples[0].encode('utf-8'), dictionary.id)
+        assert decompress('zstd', data, dictionary.id) == samples[0]
+
+CODECS = ['zlib'] + (['zstd'] if description_store.zstandard else [])
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_codecs_are_prepared_once_and_shared_by_threads(app, codec):
+    import threading
+    
+    samples = descriptions(200)
+    with app.app_context():
+        dictionary = train_dictionary(samples, codec=codec)
+        db.session.commit()
+        
+        first = compress(codec, samples[0].encode('utf-8'), dictionary.id)
+        assert compress(codec, samples[0].encode('utf-8'), dictionary.id) == first
+        prepared = dict(description_store._prepared)
+        
+        results = {}
+        
+        def worker(offset):
+            for text in samples[offset::4]:
+                results[text] = decompress(codec, compress(codec, text.encode('utf-8'), dictionary.id), dictionary.id)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(results) == len(samples)
+        assert all(text == result for text, result in results.items())
+        # Other threads reused the dictionary digested by the first call
+        assert all(description_store._prepared[key] is value for key, value in prepared.items())
+
+def test_too_few_samples_train_nothing(app):
+    with app.app_context():
+        assert train_dictionary(descriptions(5), codec='zlib') is None
+
+def test_store_deduplicates_and_reads_back(app):
+    text = descriptions(1)[0]
+    with app.app_context():
+        first, second = make_job('A'), make_job('B')
+        first.description = text
+        second.description = text
+        db.session.add_all([first, second])
+        db.session.commit()
+        
+        assert JobDescription.query.count() == 1
+        assert first.description_id == second.description_id
+        
+        db.session.expire_all()
+        description_store.reset_caches()
+        assert db.session.get(Job, first.id).description == text
+
+def test_store_reuses_row_inserted_concurrently(app, monkeypatch):
+    text = descriptions(1)[0]
+    with app.app_context():
+        existing = store_description(text)
+        db.session.commit()
+        
+        # Simulate the other writer committing between our lookup and insert
+        lookups = iter([None])
+        find = description_store.find_description
+        monkeypatch.setattr(description_store, 'find_description', lambda digest: next(lookups, None) or find(digest))
+        
+        job = make_job('A')
+        job.description = text
+        db.session.add(job)
+        db.session.commit()
+        
+        assert job.description_id == existing.id
+        assert JobDescription.query.count() == 1
+
+def test_failed_job_insert_leaves_no_description(app):
+    text = descriptions(1)[0]
+    client = app.test_client()
+    
+    # No title: the job insert fails on NOT NULL after the description was stored
+    response = client.post('/api/jobs', json={'company': 'Acme', 'location': 'Remote', 'description': text})
+    assert response.status_code == 400
+    
+    with app.app_context():
+        assert Job.query.count() == 0
+        assert JobDescription.query.count() == 0
+
+def test_failed_ingest_batch_leaves_no_description(app):
+    from routes import ingest_scraped_jobs
+    
+    texts = descriptions(2)
+    with app.app_context():
+        with pytest.raises(Exception):
+            ingest_scraped_jobs([
+                {'title': 'A', 'company': 'Acme', 'location': 'Remote', 'description': texts[0]},
+                {'title': 'B', 'company': 'Acme', 'location': None, 'description': texts[1]},
+            ])
+        db.session.rollback()
+        
+        assert Job.query.count() == 0
+        assert JobDescription.query.count() == 0
+
+def test_store_keeps_short_texts_raw(app):
+    with app.app_context():
+        assert store_description('Remote').codec == 'raw'
+        assert store_description('') is None
+
+def test_migrate_then_prune(app):
+    samples = descriptions(25)
+    with app.app_context():
+        db.session.add_all(make_job(f'Job {i}', _description=text) for i, text in enumerate(samples))
+        db.session.commit()
+        
+        assert migrate_descriptions(batch_size=10) == 25
+        report = space_report()
+        assert report['jobs_in_store'] == 25
+        assert report['legacy_inline_bytes'] == 0
+        assert DescriptionDictionary.query.count() == 1
+        assert Job.query.first().description == samples[0]
+        
+        db.session.delete(Job.query.first())
+        db.session.commit()
+        assert space_report()['unused_descriptions'] == 1
+        assert prune_descriptions() == 1
+        assert JobDescription.query.count() == 24
@@ -0,0 +1,70 @@
+import pytest
+import routes
+from database import db
+from models import Job
+
+JOBS = [
+    ('Backend Engineer', 'Acme', 'Remote', 'Full-time', 'Senior'),
+    ('Frontend Engineer', 'Acme', 'Berlin', 'Full-time', 'Mid'),
+    ('Data Engineer', 'Globex', 'Remote', 'Contract', 'Mid'),
+    ('QA Engineer', 'Initech', 'Remote', 'Full-time', 'Junior'),
+]
+
+@pytest.fixture
+def client(app):
+    routes.invalidate_facet_cache()
+    with app.app_context():
+        db.session.add_all(Job(title=title, company=company, location=location, job_type=job_type,
+                               experience_level=level) for title, company, location, job_type, level in JOBS)
+        db.session.commit()
+    yield app.test_client()
+    routes.invalidate_facet_cache()
+
+def counts(facet):
+    return {entry['name']: entry['count'] for entry in facet}
+
+def test_facet_counts(client):
+    result = client.get('/api/jobs/facets').get_json()
+    
+    assert result['total'] == 4
+    assert counts(result['facets']['company']) == {'Acme': 2, 'Globex': 1, 'Initech': 1}
+    assert counts(result['facets']['job_type']) == {'Full-time': 3, 'Contract': 1}
+    assert result['facets']['company'][0] == {'name': 'Acme', 'count': 2}
+
+def test_facet_counts_follow_filters_and_limit(client):
+    result = client.get('/api/jobs/facets?location=remote&job_type=full&limit=1').get_json()
+    
+    assert result['total'] == 2
+    assert counts(result['facets']['location']) == {'Remote': 2}
+    assert len(result['facets']['company']) == 1
+    assert result['facets']['experience_level'][0]['count'] == 1
+
+def test_facets_are_cached_until_jobs_change(client, monkeypatch):
+    calls = []
+    compute = routes.compute_facets
+    monkeypatch.setattr(routes, 'compute_facets', lambda *args: calls.append(args) or compute(*args))
+    
+    client.get('/api/jobs/facets?company=acme')
+    client.get('/api/jobs/facets?company=acme')
+    assert len(calls) == 1
+    
+    client.post('/api/jobs', json={'title': 'SRE', 'company': 'Acme', 'location': 'Remote'})
+    assert client.get('/api/jobs/facets?company=acme').get_json()['total'] == 3
+    assert len(calls) == 2
+
+def test_result_overlapping_an_invalidation_is_not_cached(client, monkeypatch):
+    compute = routes.compute_facets
+    
+    def racing_compute(filters, limit):
+        result = compute(filters, limit)
+        # A write commits and invalidates after the counts were read
+        routes.invalidate_facet_cache()
+        return result
+    
+    monkeypatch.setattr(routes, 'compute_facets', racing_compute)
+    assert client.get('/api/jobs/facets').get_json()['total'] == 4
+    assert routes._facet_cache == {}
+    
+    monkeypatch.setattr(routes, 'compute_facets', compute)
+    client.get('/api/jobs/facets')
+    assert len(routes._facet_cache) == 1
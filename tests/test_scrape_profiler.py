@@ -0,0 +1,124 @@
+import json
+import pytest
+import scrape_profiler
+from scrape_profiler import NullProfiler, ScrapeProfiler
+
+class FakeClock:
+    """Stands in for the time module: wall and thread CPU time advance only when told"""
+    
+    def __init__(self):
+        self.wall = 100.0
+        self.cpu = 10.0
+    
+    def perf_counter(self):
+        return self.wall
+    
+    def thread_time(self):
+        return self.cpu
+    
+    def sleep(self, seconds):
+        self.wall += seconds
+    
+    def work(self, seconds):
+        self.wall += seconds
+        self.cpu += seconds
+
+class FakeDriver:
+    """WebDriver stand-in: each command blocks 0.3s and spends 0.01s of CPU building it"""
+    
+    def __init__(self, clock):
+        self.clock = clock
+        self.commands = []
+    
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        self.clock.work(0.01)
+        self.clock.sleep(0.29)
+        return {'value': None}
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scrape_profiler, 'time', clock)
+    return clock
+
+def run_scrape(clock, profiler):
+    driver = profiler.instrument_driver(FakeDriver(clock))
+    with profiler:
+        with profiler.phase('page'):
+            clock.work(0.1)
+            with profiler.sleeping():
+                clock.sleep(0.5)
+            driver.execute('get', {'url': 'https://example.com'})
+            with profiler.phase('extract'):
+                clock.work(0.2)
+                driver.execute('findElements')
+        with profiler.phase('ingest'):
+            clock.work(0.05)
+    return driver
+
+def test_time_is_attributed_to_phases(clock):
+    profiler = ScrapeProfiler(sample_interval=0.001)
+    driver = run_scrape(clock, profiler)
+    report = profiler.report()
+    phases = report['phases']
+    
+    assert driver.commands == ['get', 'findElements']
+    assert phases['page'] == pytest.approx({'wall': 1.4, 'cpu': 0.32, 'sleep': 0.5, 'webdriver': 0.58,
+                                            'other': 0.0, 'count': 1})
+    assert phases['sleep'] == pytest.approx({'wall': 0.5, 'cpu': 0.0, 'sleep': 0.5, 'webdriver': 0.0,
+                                             'other': 0.0, 'count': 1})
+    assert phases['extract'] == pytest.approx({'wall': 0.5, 'cpu': 0.21, 'sleep': 0.0, 'webdriver': 0.29,
+                                               'other': 0.0, 'count': 1})
+    assert phases['ingest']['cpu'] == pytest.approx(0.05)
+    # Totals only count top-level phases, so nested time is not added twice
+    assert report['totals'] == pytest.approx({'wall': 1.45, 'cpu': 0.37, 'sleep': 0.5, 'webdriver': 0.58,
+                                              'other': 0.0})
+
+def test_trace_keeps_nesting_and_start_order(clock):
+    profiler = ScrapeProfiler()
+    run_scrape(clock, profiler)
+    
+    assert [(span['name'], span['depth'], span['start']) for span in profiler.trace()] == pytest.approx([
+        ('page', 0, 0.0), ('sleep', 1, 0.1), ('extract', 1, 0.9), ('ingest', 0, 1.4)
+    ])
+
+def test_speedscope_events_are_balanced_and_ordered(clock):
+    profiler = ScrapeProfiler()
+    run_scrape(clock, profiler)
+    document = profiler.speedscope()
+    evented, sampled = document['profiles']
+    frames = document['shared']['frames']
+    
+    ats = [event['at'] for event in evented['events']]
+    assert ats == sorted(ats)
+    assert evented['endValue'] == pytest.approx(1.45)
+    
+    stack = []
+    for event in evented['events']:
+        if event['type'] == 'O':
+            stack.append(event['frame'])
+        else:
+            assert stack.pop() == event['frame']
+    assert stack == []
+    assert [frames[e['frame']]['name'] for e in evented['events'] if e['type'] == 'O'] == \
+        ['page', 'sleep', 'extract', 'ingest']
+    
+    assert len(sampled['samples']) == len(sampled['weights'])
+    assert all(0 <= index < len(frames) for sample in sampled['samples'] for index in sample)
+
+def test_write_outputs_files(clock, tmp_path):
+    profiler = ScrapeProfiler(output_dir=str(tmp_path))
+    run_scrape(clock, profiler)
+    paths = profiler.write()
+    
+    with open(paths['trace']) as f:
+        assert [span['name'] for span in json.load(f)['phases']] == ['page', 'sleep', 'extract', 'ingest']
+    with open(paths['speedscope']) as f:
+        assert json.load(f)['exporter'] == 'scrape_profiler'
+    assert (tmp_path / paths['pstats'].rsplit('/', 1)[-1]).exists()
+
+def test_drivers_without_execute_are_left_alone(clock):
+    driver = object()
+    assert ScrapeProfiler().instrument_driver(driver) is driver
+    assert NullProfiler().instrument_driver(driver) is driver
@@ -0,0 +1,152 @@
+import json
+import pytest
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, WebDriverException
+from selenium.webdriver.common.by import By
+from scrape_replay import ReplayDriver, matches_steps, parse_html, parse_selector, replay_scraper, select
+
+PAGE = """
+<html><body>
+  <div id="results" class="list">
+    <div class="job_seen_beacon card" data-jk="a1" lang="en-US">
+      <h2 class="jobTitle"><a href="/viewjob?jk=a1"><span title="Python Dev">Python Dev</span></a></h2>
+      <span data-testid="company-name">Acme</span>
+    </div>
+    <div class="card" data-jk="b2" lang="en">
+      <section><h2 class="jobTitle"><a href="https://example.com/b2">Go Dev</a></h2></section>
+    </div>
+  </div>
+  <script>var ignored = "<div class='card'>";</script>
+</body></html>
+"""
+
+@pytest.fixture
+def document():
+    return parse_html(PAGE)
+
+def ids(nodes):
+    return [node.attrs.get('data-jk') or node.attrs.get('href') or node.tag for node in nodes]
+
+def test_parse_selector_groups_and_combinators():
+    groups = parse_selector('div.card > h2.jobTitle a, [data-jk="x y"]')
+    
+    assert groups == [
+        [(' ', [('tag', 'div'), ('class', 'card')]),
+         ('>', [('tag', 'h2'), ('class', 'jobTitle')]),
+         (' ', [('tag', 'a')])],
+        [(' ', [('attr', 'data-jk', '=', 'x y')])]
+    ]
+
+@pytest.mark.parametrize('selector', ['div..card', 'div:first-child', 'a b.', ' , '])
+def test_unsupported_selectors_raise(selector):
+    with pytest.raises(InvalidSelectorException):
+        parse_selector(selector)
+
+def test_descendant_and_child_combinators(document):
+    assert ids(select(document, By.CSS_SELECTOR, '.card h2.jobTitle a')) == ['/viewjob?jk=a1', 'https://example.com/b2']
+    # The second title sits inside a <section>, so it is not a child of the card
+    assert ids(select(document, By.CSS_SELECTOR, '.card > h2 a')) == ['/viewjob?jk=a1']
+
+def test_matches_steps_checks_ancestors_right_to_left(document):
+    span = select(document, By.TAG_NAME, 'span')[0]
+    
+    assert matches_steps(span, parse_selector('#results span[title]')[0])
+    assert matches_steps(span, parse_selector('a > span')[0])
+    assert not matches_steps(span, parse_selector('h2 > span')[0])
+    assert not matches_steps(span, parse_selector('section span')[0])
+
+@pytest.mark.parametrize('selector, expected', [
+    ('[data-jk]', ['a1', 'b2']),
+    ('[data-jk=b2]', ['b2']),
+    ('[class~="card"]', ['a1', 'b2']),
+    ('[class~="car"]', []),
+    ('[data-jk^="a"]', ['a1']),
+    ('[data-jk$="2"]', ['b2']),
+    ("[class*='seen']", ['a1']),
+    ('[lang|=en]', ['a1', 'b2']),
+    ('div[lang|="en-US"]', ['a1']),
+])
+def test_attribute_operators(document, selector, expected):
+    assert ids(select(document, By.CSS_SELECTOR, selector)) == expected
+
+def test_selector_groups_return_document_order_without_duplicates(document):
+    found = select(document, By.CSS_SELECTOR, '[data-jk=b2], .card, .job_seen_beacon')
+    assert ids(found) == ['a1', 'b2']
+
+def test_script_text_is_not_parsed_as_markup(document):
+    assert len(select(document, By.CLASS_NAME, 'card')) == 2
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    url = 'https://www.indeed.com/jobs?q=python&l=&start=0'
+    (tmp_path / 'page.html').write_text(PAGE, encoding='utf-8')
+    (tmp_path / 'manifest.json').write_text(json.dumps({
+        'search_term': 'python',
+        'location': '',
+        'max_pages': 1,
+        'pages': {url: {'file': 'page.html', 'scroll_height': 1200}}
+    }))
+    return tmp_path, url
+
+def test_driver_serves_recorded_page(fixture_dir):
+    path, url = fixture_dir
+    driver = ReplayDriver(str(path))
+    driver.get(url)
+    
+    card = driver.find_element(By.CSS_SELECTOR, '[data-jk]')
+    link = card.find_element(By.CSS_SELECTOR, 'h2.jobTitle a')
+    assert link.text == 'Python Dev'
+    assert link.get_attribute('href') == 'https://www.indeed.com/viewjob?jk=a1'
+    assert driver.execute_script('return document.body.scrollHeight') == 1200
+    with pytest.raises(NoSuchElementException):
+        card.find_element(By.CSS_SELECTOR, 'section')
+
+def test_driver_unknown_url(fixture_dir):
+    path, _ = fixture_dir
+    lenient = ReplayDriver(str(path))
+    lenient.get('https://www.indeed.com/jobs?q=other')
+    assert lenient.find_elements(By.CSS_SELECTOR, '[data-jk]') == []
+    assert lenient.missing == ['https://www.indeed.com/jobs?q=other']
+    
+    strict = ReplayDriver(str(path), strict=True)
+    with pytest.raises(WebDriverException):
+        strict.get('https://www.indeed.com/jobs?q=other')
+    assert strict.missing == ['https://www.indeed.com/jobs?q=other']
+
+def test_replay_scraper_extracts_recorded_jobs(fixture_dir):
+    path, _ = fixture_dir
+    driver = ReplayDriver(str(path), strict=True)
+    jobs = replay_scraper(driver).scrape_jobs('python', '', max_pages=1)
+    
+    assert [job['title'] for job in jobs] == ['Python Dev', 'Go Dev']
+    assert jobs[0]['company'] == 'Acme'
+    assert driver.missing == []
+
+class LazyDriver(ReplayDriver):
+    """Live-browser stand-in whose job cards only appear once the page is scrolled"""
+    
+    def get(self, url):
+        super().get(url)
+        self.loaded = (self.page_source, self.document)
+        self.page_source = '<html><body><div id="results">Loading</div></body></html>'
+        self.document = parse_html(self.page_source)
+    
+    def execute_script(self, script, *args):
+        if 'scrollTo' in script:
+            self.page_source, self.document = self.loaded
+        return super().execute_script(script, *args)
+
+def test_record_saves_page_as_scraped(fixture_dir, tmp_path, monkeypatch):
+    import selenium_scraper
+    from scrape_replay import record_fixtures
+    
+    live_dir, url = fixture_dir
+    monkeypatch.setattr(selenium_scraper.webdriver, 'Chrome', lambda options: LazyDriver(str(live_dir)))
+    monkeypatch.setattr(selenium_scraper.time, 'sleep', lambda seconds: None)
+    
+    out = tmp_path / 'recorded'
+    live_jobs = record_fixtures(str(out), 'python', '', max_pages=1)
+    manifest = json.loads((out / 'manifest.json').read_text())
+    
+    assert [job['title'] for job in live_jobs] == ['Python Dev', 'Go Dev']
+    assert manifest['jobs'] == replay_scraper(ReplayDriver(str(out), strict=True)).scrape_jobs('python', '', max_pages=1)
+    assert 'data-jk' in (out / manifest['pages'][url]['file']).read_text()
@@ -0,0 +1,150 @@
+import threading
+import pytest
+import throttling
+from throttling import MemoryRateLimiter, MemorySingleFlight
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(throttling.time, 'monotonic', clock)
+    return clock
+
+def test_bucket_allows_burst_then_rejects(clock):
+    limiter = MemoryRateLimiter()
+    
+    assert [limiter.acquire('k', 1, 3)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.acquire('k', 1, 3)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+def test_bucket_refills_at_rate(clock):
+    limiter = MemoryRateLimiter()
+    limiter.acquire('k', 2, 1)
+    
+    clock.now += 0.25
+    allowed, retry_after = limiter.acquire('k', 2, 1)
+    assert not allowed
+    assert retry_after == pytest.approx(0.25)
+    
+    clock.now += 0.25
+    assert limiter.acquire('k', 2, 1) == (True, 0)
+
+def test_buckets_are_per_key(clock):
+    limiter = MemoryRateLimiter()
+    assert limiter.acquire('a', 1, 1)[0]
+    assert not limiter.acquire('a', 1, 1)[0]
+    assert limiter.acquire('b', 1, 1)[0]
+
+def test_rejected_request_gets_retry_after(make_app):
+    app = make_app(THROTTLE_BUDGETS={'api.get_stats': (1 / 30, 1)})
+    client = app.test_client()
+    
+    assert client.get('/api/stats').status_code == 200
+    response = client.get('/api/stats')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    assert app.extensions['throttle'].counters.snapshot()['rejected:api.get_stats'] == 1
+
+def test_preflight_is_not_charged(make_app):
+    app = make_app(THROTTLE_BUDGETS={'api.get_stats': (1 / 30, 1)})
+    client = app.test_client()
+    
+    for _ in range(3):
+        client.options('/api/stats')
+    assert client.get('/api/stats').status_code == 200
+
+def test_exempt_endpoint_is_never_limited(make_app):
+    app = make_app(THROTTLE_BUDGETS={'default': (1 / 30, 1)})
+    client = app.test_client()
+    
+    assert all(client.get('/api/health').status_code == 200 for _ in range(5))
+
+def test_key_func_separates_clients(make_app):
+    app = make_app(THROTTLE_BUDGETS={'api.get_stats': (1 / 30, 1)},
+                   THROTTLE_KEY_FUNC=lambda: throttling.request.headers.get('X-Client'))
+    client = app.test_client()
+    
+    assert client.get('/api/stats', headers={'X-Client': 'a'}).status_code == 200
+    assert client.get('/api/stats', headers={'X-Client': 'b'}).status_code == 200
+    assert client.get('/api/stats', headers={'X-Client': 'a'}).status_code == 429
+
+class WatchedEvent(threading.Event):
+    """Event that reports when somebody starts waiting on it"""
+    
+    def __init__(self):
+        super().__init__()
+        self.waiting = threading.Event()
+    
+    def wait(self, timeout=None):
+        self.waiting.set()
+        return super().wait(timeout)
+
+def run_flight(fn):
+    """Run fn as a flight's leader while a second caller joins it; returns both outcomes"""
+    flights = MemorySingleFlight()
+    
+    class WatchedCall(MemorySingleFlight.Call):
+        def __init__(self):
+            super().__init__()
+            self.done = WatchedEvent()
+    
+    flights.Call = WatchedCall
+    started, release = threading.Event(), threading.Event()
+    outcomes = {}
+    
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+    
+    def call(name, fn):
+        try:
+            outcomes[name] = flights.do('k', fn)
+        except Exception as e:
+            outcomes[name] = e
+    
+    leader = threading.Thread(target=call, args=('leader', leader_fn))
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=call, args=('follower', lambda: 'own'))
+    follower.start()
+    assert flights.calls['k'].done.waiting.wait(5)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    return flights, outcomes
+
+def test_single_flight_shares_result():
+    flights, outcomes = run_flight(lambda: 'body')
+    
+    assert outcomes == {'leader': ('body', False), 'follower': ('body', True)}
+    assert flights.calls == {}
+
+def test_single_flight_propagates_error_to_followers():
+    def fail():
+        raise ValueError('boom')
+    
+    flights, outcomes = run_flight(fail)
+    
+    assert isinstance(outcomes['leader'], ValueError)
+    assert outcomes['follower'] is outcomes['leader']
+    # A failed flight is not remembered; the next call runs again
+    assert flights.do('k', lambda: 'again') == ('again', False)
+
+def test_unreachable_redis_fails_open(make_app):
+    pytest.importorskip('redis')
+    # Nothing listens on port 1, so every Redis call fails to connect
+    app = make_app(THROTTLE_REDIS_URL='redis://127.0.0.1:1/0')
+    client = app.test_client()
+    
+    assert client.get('/api/stats').status_code == 200
+    response = client.get('/api/throttle/stats')
+    assert response.status_code == 200
+    assert response.get_json() == {'backend': 'redis-unavailable', 'counters': {}}
@@ -0,0 +1,343 @@
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+from urllib.parse import urlencode
+from flask import Response, current_app, jsonify, request
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Errors from the shared backend; requests fall back to running unthrottled
+BACKEND_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+logger = logging.getLogger(__name__)
+
+# Token-bucket budgets as (tokens per second, burst size), keyed by endpoint.
+# None exempts an endpoint. /scrape launches Chrome, so it gets a tight budget.
+DEFAULT_BUDGETS = {
+    'default': (10, 40),
+    'api.trigger_scraping': (1 / 60, 2),
+    'api.health_check': None,
+}
+
+class MemoryCounters:
+    """Per-process event counters"""
+    
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+    
+    def incr(self, name):
+        with self.lock:
+            self.counts[name] += 1
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+class MemoryRateLimiter:
+    """Token buckets held in this process; each worker enforces its own budget"""
+    
+    def __init__(self, max_buckets=10000, idle_timeout=600):
+        self.buckets = {}
+        self.max_buckets = max_buckets
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+    
+    def acquire(self, key, rate, burst):
+        """Take one token; returns (allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            
+            if len(self.buckets) > self.max_buckets:
+                self._evict(now)
+        
+        return allowed, 0 if allowed else (1 - tokens) / rate
+    
+    def _evict(self, now):
+        self.buckets = {k: v for k, v in self.buckets.items() if now - v[1] < self.idle_timeout}
+        if len(self.buckets) > self.max_buckets:
+            self.buckets.clear()
+
+class MemorySingleFlight:
+    """Let concurrent identical calls in this process share one execution"""
+    
+    class Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+    
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+    
+    def do(self, key, fn):
+        """Run fn once per key at a time; returns (result, shared)"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = self.Call()
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+class RedisCounters:
+    """Event counters shared by every worker through Redis"""
+    
+    def __init__(self, client, prefix):
+        self.client = client
+        self.prefix = f'{prefix}count:'
+    
+    def incr(self, name):
+        try:
+            self.client.incr(self.prefix + name)
+        except redis.RedisError as e:
+            logger.warning(f"Could not update counter {name}: {e}")
+    
+    def snapshot(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        values = self.client.mget(keys) if keys else []
+        return {key.decode()[len(self.prefix):]: int(value) for key, value in zip(keys, values) if value}
+
+class RedisRateLimiter:
+    """Token buckets stored in Redis so the budget holds across all workers"""
+    
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+    
+    def __init__(self, client, prefix):
+        self.prefix = f'{prefix}bucket:'
+        self.script = client.register_script(self.SCRIPT)
+    
+    def acquire(self, key, rate, burst):
+        """Take one token; returns (allowed, seconds until a token is available)"""
+        allowed, tokens = self.script(keys=[self.prefix + key], args=[rate, burst, time.time()])
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / rate
+
+class RedisSingleFlight:
+    """Coalesce identical calls across workers through a Redis lock and result key.
+    
+    The first caller takes a lock holding a flight token and publishes its
+    result under that token; others poll for it. If the leader dies or times
+    out, a waiting caller runs the call itself rather than failing.
+    """
+    
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+    
+    def __init__(self, client, prefix, lock_timeout=30, result_ttl=5, poll_interval=0.02):
+        self.client = client
+        self.prefix = f'{prefix}flight:'
+        self.lock_timeout = lock_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.release = client.register_script(self.RELEASE_SCRIPT)
+    
+    def do(self, key, fn):
+        """Run fn once per key at a time across workers; returns (result, shared)"""
+        lock_key = f'{self.prefix}lock:{key}'
+        deadline = time.monotonic() + self.lock_timeout
+        
+        while time.monotonic() < deadline:
+            token = uuid.uuid4().hex
+            if self.client.set(lock_key, token, nx=True, ex=self.lock_timeout):
+                try:
+                    result = fn()
+                    self.client.set(f'{self.prefix}result:{key}:{token}', self.encode(result), ex=self.result_ttl)
+                finally:
+                    self.release(keys=[lock_key], args=[token])
+                return result, False
+            
+            leader_token = self.client.get(lock_key)
+            if leader_token is None:
+                continue
+            
+            result_key = f'{self.prefix}result:{key}:{leader_token.decode()}'
+            while time.monotonic() < deadline:
+                cached = self.client.get(result_key)
+                if cached is not None:
+                    return self.decode(cached), True
+                if self.client.get(lock_key) != leader_token:
+                    # Leader finished without a result (it raised) or lost the lock
+                    break
+                time.sleep(self.poll_interval)
+            else:
+                break
+            
+            cached = self.client.get(result_key)
+            if cached is not None:
+                return self.decode(cached), True
+        
+        return fn(), False
+    
+    @staticmethod
+    def encode(result):
+        status, mimetype, body = result
+        return json.dumps([status, mimetype]).encode() + b'\n' + body
+    
+    @staticmethod
+    def decode(data):
+        header, _, body = data.partition(b'\n')
+        status, mimetype = json.loads(header)
+        return status, mimetype, body
+
+def client_address():
+    """Default client key: the peer address.
+    
+    Behind a reverse proxy this is the proxy's address unless the app trusts
+    X-Forwarded-For (PROXY_COUNT, see create_app) or THROTTLE_KEY_FUNC is set.
+    """
+    return request.remote_addr
+
+class Throttle:
+    """Rate limiter, request coalescing and their counters for one app"""
+    
+    def __init__(self, limiter, flights, counters, budgets, backend, key_func=client_address):
+        self.limiter = limiter
+        self.flights = flights
+        self.counters = counters
+        self.budgets = budgets
+        self.backend = backend
+        self.key_func = key_func
+    
+    def stats(self):
+        """Backend name and counters; an unreachable Redis reports no counts"""
+        try:
+            return {'backend': self.backend, 'counters': self.counters.snapshot()}
+        except BACKEND_ERRORS as e:
+            logger.warning(f"Could not read throttle counters: {e}")
+            return {'backend': f'{self.backend}-unavailable', 'counters': {}}
+
+def init_throttle(app):
+    """Set up throttling on an app, shared through Redis when THROTTLE_REDIS_URL is set.
+    
+    THROTTLE_KEY_FUNC may be a callable returning the client identity for
+    the current request; it defaults to the peer address.
+    """
+    budgets = dict(DEFAULT_BUDGETS, **app.config.get('THROTTLE_BUDGETS', {}))
+    redis_url = app.config.get('THROTTLE_REDIS_URL')
+    
+    if redis_url and redis is not None:
+        client = redis.Redis.from_url(redis_url)
+        prefix = app.config.get('THROTTLE_REDIS_PREFIX', 'jobs:throttle:')
+        throttle = Throttle(RedisRateLimiter(client, prefix), RedisSingleFlight(client, prefix),
+                            RedisCounters(client, prefix), budgets, 'redis')
+    else:
+        if redis_url:
+            logger.warning("THROTTLE_REDIS_URL is set but redis is not installed; throttling per process")
+        throttle = Throttle(MemoryRateLimiter(), MemorySingleFlight(), MemoryCounters(), budgets, 'memory')
+    
+    throttle.key_func = app.config.get('THROTTLE_KEY_FUNC') or client_address
+    app.extensions['throttle'] = throttle
+    return throttle
+
+def check_rate_limit():
+    """before_request hook: reject the request with 429 once its bucket is empty"""
+    throttle = current_app.extensions.get('throttle')
+    if throttle is None or request.endpoint is None:
+        return None
+    
+    # CORS preflights precede every cross-origin JSON request; charging them
+    # would halve each budget and spend /scrape's burst on a single click
+    if request.method == 'OPTIONS':
+        return None
+    
+    budget = throttle.budgets.get(request.endpoint, throttle.budgets['default'])
+    if budget is None:
+        return None
+    
+    rate, burst = budget
+    key = f'{request.endpoint}:{throttle.key_func()}'
+    try:
+        allowed, retry_after = throttle.limiter.acquire(key, rate, burst)
+    except Exception as e:
+        # A broken shared backend should not take the API down with it
+        logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+        return None
+    
+    if allowed:
+        return None
+    
+    throttle.counters.incr('rejected')
+    throttle.counters.incr(f'rejected:{request.endpoint}')
+    response = jsonify({'error': 'Rate limit exceeded'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def coalesce(view):
+    """Share one execution and one serialized body among identical concurrent GETs"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        throttle = current_app.extensions.get('throttle')
+        if throttle is None:
+            return view(*args, **kwargs)
+        
+        key = f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+        
+        def run():
+            response = current_app.make_response(view(*args, **kwargs))
+            return response.status_code, response.mimetype, response.get_data()
+        
+        try:
+            (status, mimetype, body), shared = throttle.flights.do(key, run)
+        except BACKEND_ERRORS as e:
+            # As with the rate limiter, a broken shared backend must not fail the request
+            logger.warning(f"Request coalescing unavailable, running {request.endpoint} directly: {e}")
+            return view(*args, **kwargs)
+        if shared:
+            throttle.counters.incr('coalesced')
+            throttle.counters.incr(f'coalesced:{request.endpoint}')
+        return Response(body, status=status, mimetype=mimetype)
+    
+    return wrapper
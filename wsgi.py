@@ -0,0 +1,4 @@
+from app import create_app
+
+# Built once at import time so gunicorn's preload_app can share it across workers
+app = create_app()